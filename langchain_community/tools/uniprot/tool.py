@@ -1,6 +1,9 @@
 from typing import Optional
 
-from langchain_core.callbacks import CallbackManagerForToolRun
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForToolRun,
+    CallbackManagerForToolRun,
+)
 from langchain_core.pydantic_v1 import Field
 from langchain_core.tools import BaseTool
 
@@ -23,4 +26,12 @@ class UniprotQueryRun(BaseTool):
         run_manager: Optional[CallbackManagerForToolRun] = None,
     ) -> str:
         """Use the UniProt tool."""
-        return self.api_wrapper.run(query)
\ No newline at end of file
+        return self.api_wrapper.run(query)
+
+    async def _arun(
+        self,
+        query: str,
+        run_manager: Optional[AsyncCallbackManagerForToolRun] = None,
+    ) -> str:
+        """Use the UniProt tool asynchronously."""
+        return await self.api_wrapper.arun(query)
@@ -1,125 +1,406 @@
+import asyncio
+import copy
+import hashlib
 import json
 import logging
+import threading
 import time
 import urllib.error
 import urllib.parse
 import urllib.request
-from typing import Any, Dict, Iterator, List
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional
 
 from langchain_core.documents import Document
 from langchain_core.pydantic_v1 import BaseModel, root_validator
 
 logger = logging.getLogger(__name__)
 
+try:
+    import orjson
+
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Entry fields parse_protein_details can skip, with the value they get when skipped
+PARSE_FIELDS = {
+    "Function": "No function available",
+    "Subcellular Location": "No subcellular location available",
+    "Domains": "No domain information available",
+    "Sequence": "",
+    "Structures": [],
+    "PubMed Citations": [],
+}
+
+ENTRY_FIELDS = [
+    "Primary Accession",
+    "UniProtKB ID",
+    "Protein Name",
+    "Organism",
+    *PARSE_FIELDS,
+]
+
+# UniProtKB return fields covering everything parse_protein_details reads.
+BULK_FIELDS = [
+    "accession",
+    "id",
+    "protein_name",
+    "organism_name",
+    "cc_function",
+    "cc_subcellular_location",
+    "cc_domain",
+    "sequence",
+    "xref_pdb",
+    "lit_pubmed_id",
+]
+
+# Response cache namespaces for a query's accessions and for parsed entries
+SEARCH_NAMESPACE = "uniprot.search_proteins"
+ENTRY_NAMESPACE = "uniprot.get_protein_details"
+
+
 class UniProtAPIWrapper(BaseModel):
     parse: Any  #: :meta private:
+    session: Any  #: :meta private:
+    host_semaphores: Any  #: :meta private:
 
     base_url_search: str = "https://rest.uniprot.org/uniprotkb/search?"
     base_url_entry: str = "https://rest.uniprot.org/uniprotkb/"
     max_retry: int = 10
     sleep_time: float = 0.2
+    max_backoff: float = 30.0
+    """Upper bound in seconds on any one retry delay, including a server's ``Retry-After``."""
+    max_concurrency: int = 8
+    timeout: float = 30.0
+    bulk: bool = True
+    bulk_fields: List[str] = BULK_FIELDS
+    bulk_page_size: int = 500
+    cache: Any = None
+    """Optional response cache exposing ``get(namespace, query)`` and ``set(namespace, query, value)``."""
+    rate_limiter: Any = None
+    """Optional limiter whose ``acquire()`` is called before every HTTP request."""
+    request_hook: Any = None
+    """Optional callable receiving ``(host, status_code, seconds)`` after every HTTP request."""
 
     top_k_results: int = 3
     MAX_QUERY_LENGTH: int = 300
     doc_content_chars_max: int = 10000
     email: str = "your_email@example.com"
 
+    sequence_preview_length: int = 100
+    """Residues of the sequence included in text output; length and hash are always given."""
+    max_structures: int = 10
+    max_citations: int = 10
+    parse_fields: Optional[List[str]] = None
+    """Entry fields to extract (see ``PARSE_FIELDS``); the rest are left empty. All by default."""
+
     @root_validator()
     def validate_environment(cls, values: Dict) -> Dict:
+        try:
+            import requests
+            from requests.adapters import HTTPAdapter
+        except ImportError:
+            raise ImportError(
+                "Could not import requests python package. "
+                "Please install it with `pip install requests`."
+            )
+        # One pooled session per wrapper so entry fetches reuse keep-alive
+        # connections instead of opening a new socket per accession.
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=values["max_concurrency"],
+            pool_maxsize=values["max_concurrency"],
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        values["session"] = session
+        values["host_semaphores"] = {"_lock": threading.Lock()}
         return values
 
     def run(self, query: str) -> str:
         try:
-            docs = [
-                f"Entry ID: {result['Primary Accession']}\n"
-                f"Protein: {result['Protein Name']}\n"
-                f"Organism: {result['Organism']}\n"
-                f"Function:\n{result['Function']}\n"
-                f"Subcellular Location:\n{result['Subcellular Location']}\n"
-                f"Domains:\n{result['Domains']}\n"
-                f"Sequence:\n{result['Sequence']}\n"
-                f"Structures:\n{json.dumps(result['Structures'], indent=2)}\n"
-                f"PubMed Citations:\n{json.dumps(result['PubMed Citations'], indent=2)}"
-                for result in self.search_proteins(query[:self.MAX_QUERY_LENGTH])
-            ]
-            return (
-                "\n\n".join(docs)[:self.doc_content_chars_max]
-                if docs
-                else "No good UniProt Result was found"
-            )
+            parts: List[str] = []
+            remaining = self.doc_content_chars_max
+            # Consume entries lazily so nothing past the budget is fetched or formatted
+            for doc in self.iter_results(query[:self.MAX_QUERY_LENGTH]):
+                part = (("\n\n" if parts else "") + doc)[:remaining]
+                parts.append(part)
+                remaining -= len(part)
+                if remaining <= 0:
+                    break
+            return "".join(parts) if parts else "No good UniProt Result was found"
         except Exception as ex:
             return f"UniProt exception: {ex}"
 
+    def iter_results(self, query: str) -> Iterator[str]:
+        for result in self.iter_proteins(query):
+            yield self.format_entry(result)
+
+    def lazy_load(self, query: str) -> Iterator[Document]:
+        """Yield one Document per entry, with the entry's identifiers as metadata."""
+        for result in self.iter_proteins(query[:self.MAX_QUERY_LENGTH]):
+            yield Document(
+                page_content=self.format_entry(result),
+                metadata={
+                    "accession": result["Primary Accession"],
+                    "uniprot_id": result["UniProtKB ID"],
+                    "protein": result["Protein Name"],
+                    "organism": result["Organism"],
+                    "sequence_length": len(result["Sequence"]),
+                    "source": self.base_url_entry + result["Primary Accession"],
+                },
+            )
+
+    def load(self, query: str) -> List[Document]:
+        return list(self.lazy_load(query))
+
+    def format_entry(self, result: Dict) -> str:
+        sequence = result["Sequence"]
+        preview = sequence[:self.sequence_preview_length]
+        if len(sequence) > len(preview):
+            preview += "..."
+        sequence_summary = (
+            f"Length: {len(sequence)}\n"
+            f"SHA-256: {hashlib.sha256(sequence.encode('utf-8')).hexdigest()[:16]}\n"
+            f"{preview}"
+        )
+        return (
+            f"Entry ID: {result['Primary Accession']}\n"
+            f"Protein: {result['Protein Name']}\n"
+            f"Organism: {result['Organism']}\n"
+            f"Function:\n{result['Function']}\n"
+            f"Subcellular Location:\n{result['Subcellular Location']}\n"
+            f"Domains:\n{result['Domains']}\n"
+            f"Sequence:\n{sequence_summary}\n"
+            f"Structures:\n{self._format_capped(result['Structures'], self.max_structures)}\n"
+            f"PubMed Citations:\n{self._format_capped(result['PubMed Citations'], self.max_citations)}"
+        )
+
+    @staticmethod
+    def _format_capped(items: List[Dict], limit: int) -> str:
+        text = json.dumps(items[:limit], indent=2)
+        if len(items) > limit:
+            text += f"\n... and {len(items) - limit} more"
+        return text
+
+    async def arun(self, query: str) -> str:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.run, query)
+
     def search_proteins(self, query: str) -> List[Dict]:
+        return list(self.iter_proteins(query))
+
+    def iter_proteins(self, query: str) -> Iterator[Dict]:
+        """Yield parsed entries, fetching further pages or batches only as they are consumed.
+
+        With a cache, a query's accessions and each parsed entry are cached
+        separately. A cached query yields its entries one at a time from the
+        cache; otherwise results stream from UniProt and each entry is cached
+        as it arrives. The accession list is cached as soon as the search has
+        returned every hit, so a caller that stops early, such as ``run`` at
+        its character budget, still gets a cache hit next time.
+        """
+        if self.cache is None:
+            yield from self._iter_proteins(query)
+            return
+        search_key = self._cache_key(f"{self.top_k_results}:{query}")
+        accessions = self.cache.get(SEARCH_NAMESPACE, search_key)
+        if accessions is not None:
+            for accession in accessions:
+                entry = self.cache.get(ENTRY_NAMESPACE, self._cache_key(accession)) if self.bulk else None
+                yield entry if entry is not None else self.get_protein_details(accession)
+            return
+
+        def on_search(accessions: List[str]) -> None:
+            if accessions:
+                self.cache.set(SEARCH_NAMESPACE, search_key, accessions)
+
+        for entry in self._iter_proteins(query, on_search):
+            # Per-entry fetches are already cached by get_protein_details
+            if self.bulk:
+                self.cache.set(ENTRY_NAMESPACE, self._cache_key(entry["Primary Accession"]), entry)
+            yield entry
+
+    def _cache_key(self, value: str, bulk: Optional[bool] = None) -> str:
+        """Key a cached result on what shaped it: fetch mode, bulk projection and parsed fields."""
+        bulk = self.bulk if bulk is None else bulk
+        mode = "bulk:" + ",".join(self.bulk_fields) if bulk else "entry"
+        fields = "all" if self.parse_fields is None else ",".join(sorted(self.parse_fields))
+        return f"{mode}|{fields}|{value}"
+
+    def _iter_proteins(self, query: str, on_search: Any = None) -> Iterator[Dict]:
+        """Stream parsed entries; ``on_search(accessions)`` gets every hit's accession once known."""
+        if self.bulk:
+            yield from self._iter_proteins_bulk(query, on_search)
+            return
         url = (
             self.base_url_search
             + "query="
             + urllib.parse.quote(query)
             + f"&size={self.top_k_results}"
         )
-        response = urllib.request.urlopen(url)
-        data = json.loads(response.read().decode("utf-8"))
-        results = data.get("results", [])
-        return [self.get_protein_details(entry["primaryAccession"]) for entry in results]
+        data = self._get_json(url)
+        accessions = [entry["primaryAccession"] for entry in data.get("results", [])]
+        if on_search is not None:
+            on_search(accessions)
+        for i in range(0, len(accessions), self.max_concurrency):
+            yield from self.get_proteins_details(accessions[i:i + self.max_concurrency])
+
+    def search_proteins_bulk(self, query: str) -> List[Dict]:
+        """Fetch all hits from the search endpoint with a field projection.
+
+        Entries come back already projected to ``bulk_fields``, so a query
+        costs one request per page instead of one per hit. Pages beyond the
+        first are followed through the cursor in the ``Link`` header.
+        """
+        return list(self._iter_proteins_bulk(query))
+
+    def _iter_proteins_bulk(self, query: str, on_search: Any = None) -> Iterator[Dict]:
+        params = {
+            "query": query,
+            "fields": ",".join(self.bulk_fields),
+            "format": "json",
+            "size": min(self.top_k_results, self.bulk_page_size),
+        }
+        url = self.base_url_search + urllib.parse.urlencode(params)
+        remaining = self.top_k_results
+        accessions: List[str] = []
+        while url and remaining > 0:
+            response = self._get(url)
+            results = json_loads(response.content).get("results", [])[:remaining]
+            url = response.links.get("next", {}).get("url")
+            accessions.extend(entry.get("primaryAccession", "") for entry in results)
+            # Known once the top k are in or the pages run out; usually the first page
+            if on_search is not None and (len(results) == remaining or not url):
+                on_search(accessions)
+            for entry in results:
+                remaining -= 1
+                yield self.parse_protein_details(entry)
+
+    async def asearch_proteins(self, query: str) -> List[Dict]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.search_proteins, query)
+
+    def get_proteins_details(self, accessions: List[str]) -> List[Dict]:
+        """Fetch entries concurrently, returning them in the order given."""
+        if len(accessions) <= 1:
+            return [self.get_protein_details(accession) for accession in accessions]
+        workers = min(self.max_concurrency, len(accessions))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(self.get_protein_details, accessions))
 
     def get_protein_details(self, accession: str) -> Dict:
+        if self.cache is not None:
+            return self.cache.get_or_set(
+                ENTRY_NAMESPACE,
+                self._cache_key(accession, bulk=False),
+                lambda: self._get_protein_details(accession),
+            )
+        return self._get_protein_details(accession)
+
+    def _get_protein_details(self, accession: str) -> Dict:
         url = self.base_url_entry + accession
-        response = urllib.request.urlopen(url)
-        data = json.loads(response.read().decode("utf-8"))
+        data = self._get_json(url)
         return self.parse_protein_details(data)
 
-    def parse_protein_details(self, data: Dict) -> Dict:
-        protein_info = data.get("proteinDescription", {}).get("recommendedName", {}).get("fullName", {}).get("value", "")
-        organism_info = data.get("organism", {}).get("scientificName", "")
-        function_info = data.get("comments", [])
-        sequence_info = data.get("sequence", {}).get("value", "")
-        references_info = data.get("references", [])
-        structure_info = [ref for ref in data.get("uniProtKBCrossReferences", []) if ref.get("database") == "PDB"]
-
-        functions = [
-            comment.get('texts', [{}])[0].get('value', 'N/A')
-            for comment in function_info
-            if comment.get("commentType") == "FUNCTION"
-        ]
-        function_summary = "\n".join(functions) if functions else "No function available"
-
-        subcellular_locations = [
-            loc.get('location', {}).get('value', 'N/A')
-            for comment in function_info
-            if comment.get("commentType") == "SUBCELLULAR LOCATION"
-            for loc in comment.get('subcellularLocations', [])
-        ]
-        subcellular_location_summary = "\n".join(subcellular_locations) if subcellular_locations else "No subcellular location available"
-
-        domains = [
-            comment.get('texts', [{}])[0].get('value', 'N/A')
-            for comment in function_info
-            if comment.get("commentType") == "DOMAIN"
-        ]
-        domain_summary = "\n".join(domains) if domains else "No domain information available"
-
-        pubmed_citations = [
-            {
-                "title": ref.get('citation', {}).get('title', 'N/A'),
-                "authors": ", ".join(ref.get('citation', {}).get('authors', [])),
-                "journal": ref.get('citation', {}).get('journal', 'N/A'),
-                "pubmed_id": next((cr.get('id') for cr in ref.get('citation', {}).get('citationCrossReferences', []) if cr.get('database') == 'PubMed'), 'N/A'),
-                "doi": next((cr.get('id') for cr in ref.get('citation', {}).get('citationCrossReferences', []) if cr.get('database') == 'DOI'), 'N/A')
-            }
-            for ref in references_info
-        ]
+    def _host_semaphore(self, url: str) -> threading.BoundedSemaphore:
+        host = urllib.parse.urlsplit(url).netloc
+        with self.host_semaphores["_lock"]:
+            if host not in self.host_semaphores:
+                self.host_semaphores[host] = threading.BoundedSemaphore(self.max_concurrency)
+            return self.host_semaphores[host]
 
+    def _get_json(self, url: str) -> Dict:
+        return json_loads(self._get(url).content)
+
+    def _get(self, url: str) -> Any:
+        """GET a UniProt URL, backing off on rate limits and server errors."""
+        host = urllib.parse.urlsplit(url).netloc
+        with self._host_semaphore(url):
+            for attempt in range(self.max_retry + 1):
+                if self.rate_limiter is not None:
+                    self.rate_limiter.acquire()
+                started = time.perf_counter()
+                response = self.session.get(url, timeout=self.timeout)
+                if self.request_hook is not None:
+                    self.request_hook(host, response.status_code, time.perf_counter() - started)
+                if response.status_code in RETRY_STATUS_CODES and attempt < self.max_retry:
+                    retry_after = response.headers.get("Retry-After", "")
+                    delay = min(
+                        float(retry_after)
+                        if retry_after.isdigit()
+                        else self.sleep_time * 2 ** attempt,
+                        self.max_backoff,
+                    )
+                    logger.warning(
+                        f"UniProt returned {response.status_code} for {url}, "
+                        f"retrying in {delay:.2f}s"
+                    )
+                    time.sleep(delay)
+                    continue
+                response.raise_for_status()
+                return response
+
+    def parse_protein_details(self, data: Dict) -> Dict:
+        fields = PARSE_FIELDS.keys() if self.parse_fields is None else set(self.parse_fields)
         entry = {
             "Primary Accession": data.get("primaryAccession", ""),
             "UniProtKB ID": data.get("uniProtkbId", ""),
-            "Protein Name": protein_info,
-            "Organism": organism_info,
-            "Function": function_summary,
-            "Subcellular Location": subcellular_location_summary,
-            "Domains": domain_summary,
-            "Sequence": sequence_info,
-            "Structures": structure_info,
-            "PubMed Citations": pubmed_citations
+            "Protein Name": data.get("proteinDescription", {}).get("recommendedName", {}).get("fullName", {}).get("value", ""),
+            "Organism": data.get("organism", {}).get("scientificName", ""),
         }
+        # Copied so the list defaults aren't shared between entries
+        entry.update((name, copy.copy(PARSE_FIELDS[name])) for name in PARSE_FIELDS if name not in fields)
+
+        # Bucket comments by type in a single pass
+        comments = defaultdict(list)
+        if fields & {"Function", "Subcellular Location", "Domains"}:
+            for comment in data.get("comments", []):
+                comments[comment.get("commentType")].append(comment)
+
+        if "Function" in fields:
+            functions = [(c.get("texts") or [{}])[0].get("value", "N/A") for c in comments["FUNCTION"]]
+            entry["Function"] = "\n".join(functions) if functions else PARSE_FIELDS["Function"]
+
+        if "Subcellular Location" in fields:
+            locations = [
+                loc.get("location", {}).get("value", "N/A")
+                for c in comments["SUBCELLULAR LOCATION"]
+                for loc in c.get("subcellularLocations", [])
+            ]
+            entry["Subcellular Location"] = "\n".join(locations) if locations else PARSE_FIELDS["Subcellular Location"]
+
+        if "Domains" in fields:
+            domains = [(c.get("texts") or [{}])[0].get("value", "N/A") for c in comments["DOMAIN"]]
+            entry["Domains"] = "\n".join(domains) if domains else PARSE_FIELDS["Domains"]
+
+        if "Sequence" in fields:
+            entry["Sequence"] = data.get("sequence", {}).get("value", "")
+
+        if "Structures" in fields:
+            entry["Structures"] = [
+                xref for xref in data.get("uniProtKBCrossReferences", []) if xref.get("database") == "PDB"
+            ]
+
+        if "PubMed Citations" in fields:
+            citations = []
+            for ref in data.get("references", []):
+                citation = ref.get("citation", {})
+                ids = {}
+                # First id per database, matching a next(...) scan over the list
+                for xref in citation.get("citationCrossReferences", []):
+                    ids.setdefault(xref.get("database"), xref.get("id"))
+                citations.append({
+                    "title": citation.get("title", "N/A"),
+                    "authors": ", ".join(citation.get("authors", [])),
+                    "journal": citation.get("journal", "N/A"),
+                    "pubmed_id": ids.get("PubMed", "N/A"),
+                    "doi": ids.get("DOI", "N/A"),
+                })
+            entry["PubMed Citations"] = citations
 
-        return entry
\ No newline at end of file
+        return {name: entry[name] for name in ENTRY_FIELDS}
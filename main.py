@@ -3,25 +3,29 @@ from dotenv import load_dotenv
 
 st.set_page_config(page_title="Research Bot")
 
-from langchain_openai import ChatOpenAI
-from langchain.utilities import WikipediaAPIWrapper
-from langchain.memory import ConversationBufferMemory
-from langchain.chains import LLMChain
-from langchain.agents import Tool
-from langchain.agents import AgentType
-from langchain_openai import OpenAIEmbeddings
-from langchain import OpenAI
-from langchain.agents import initialize_agent
-from langchain_community.utilities import WikipediaAPIWrapper
 from langchain_community.vectorstores import Chroma
-from langchain.chains import VectorDBQA
-from langchain_community.tools.uniprot.tool import UniprotQueryRun
-from langchain_community.tools.pubmed.tool import PubmedQueryRun
-from langchain_community.tools.google_scholar.tool import GoogleScholarQueryRun
-from langchain_community.utilities.google_scholar import GoogleScholarAPIWrapper
-import sqlite3
-import pandas as pd
+from langchain.chains import RetrievalQA
+from research_agents import (
+    StreamHandler,
+    build_base_tools,
+    build_chat_agent,
+    build_chat_memory,
+    build_planned_runner,
+    build_research_agent,
+    build_response_cache,
+    memoize_tools,
+    previous_research_tool,
+)
+from research_backends import get_backends
+from research_cache import CachedEmbeddings
+from research_metrics import ReportMetrics, http_metrics
+from research_retrieval import BM25Index, HybridRetriever
+from research_store import SEARCH_CANDIDATES, ResearchStore
+from research_pipeline import ingest_research, research_sections, run_sections
+import json
 import os
+import time
+import uuid
 
 # Load environment variables from .env file
 load_dotenv()
@@ -30,174 +34,212 @@ load_dotenv()
 openai_api_key = st.sidebar.text_input("Enter OpenAI API Key", os.getenv("OPENAI_API_KEY", ""))
 serp_api_key = st.sidebar.text_input("Enter SERP API Key", os.getenv("SERP_API_KEY", ""))
 temperature = st.sidebar.slider("Temperature", 0.0, 1.0, 0.2)
+# Planned calls each section's tools directly and formats once; Agent lets the ReAct agent choose
+execution_mode = st.sidebar.radio("Section Execution", ["Planned", "Agent"])
+
+@st.cache_resource
+def get_response_cache():
+    return build_response_cache('CACHE.db')
+
+@st.cache_resource
+def get_research_store():
+    return ResearchStore('MASTER.db')
+
+MODEL = "gpt-4"
+# Report sections generated concurrently; the critical path is intro -> facts -> papers/books
+SECTION_WORKERS = 4
+# Passages the previous-research QA chain retrieves after fusing lexical and vector hits
+RETRIEVAL_K = 4
+# Rows per page in the Previous Research table
+RESEARCH_PAGE_SIZE = 50
+# Where the report embeddings live; one store per process, shared by every session
+VECTORSTORE_PATH = "./chroma_db"
+# Cached models and agents kept per process across API keys and temperatures
+MAX_CACHED_AGENTS = 16
+
+# Resource registry: everything below is built once per process and only
+# rebuilt when one of its arguments changes. Arguments with a leading
+# underscore are not hashed by Streamlit, so the vector store is keyed by
+# its version instead, which is the same for every session. The services themselves come from
+# get_backends(), which the offline benchmark points at local stand-ins.
+
+@st.cache_resource(max_entries=MAX_CACHED_AGENTS)
+def get_llm(api_key, model, temperature):
+    return get_backends().chat_model(api_key, model, temperature)
+
+@st.cache_resource
+def get_embeddings():
+    return CachedEmbeddings(get_backends().embeddings(), path='CACHE.db')
+
+@st.cache_resource
+def get_base_tools(serp_api_key):
+    return build_base_tools(
+        serp_api_key, get_response_cache(), request_hook=http_metrics.record, **get_backends().tool_options()
+    )
 
-def create_research_db():
-    with sqlite3.connect('MASTER.db') as conn:
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS Research (
-                research_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_input TEXT,
-                introduction TEXT,
-                quant_facts TEXT,
-                publications TEXT,
-                books TEXT,
-                prev_research TEXT
-            )
-        """)
-
-def create_messages_db():
-    pass
-
-def read_research_table():
-    with sqlite3.connect('MASTER.db') as conn:
-        query = "SELECT * FROM Research"
-        df = pd.read_sql_query(query, conn)
-    return df
+@st.cache_resource
+def get_research_index():
+    # Built from MASTER.db once per process, then kept current by generate_research
+    return BM25Index.from_research_db('MASTER.db')
+
+@st.cache_resource(max_entries=MAX_CACHED_AGENTS)
+def get_previous_research_qa(api_key, model, temperature, vectorstore_version, _vectorstore, k=RETRIEVAL_K):
+    llm = get_llm(api_key, model, temperature)
+    retriever = HybridRetriever(vectorstore=_vectorstore, index=get_research_index(), k=k)
+    return RetrievalQA.from_chain_type(llm=llm, retriever=retriever)
+
+def get_tools(api_key, serp_api_key, model, temperature, vectorstore_version, vectorstore):
+    tools = list(get_base_tools(serp_api_key))
+    if vectorstore:
+        qa = get_previous_research_qa(api_key, model, temperature, vectorstore_version, vectorstore)
+        tools.append(previous_research_tool(qa))
+    return tools
+
+@st.cache_resource(max_entries=MAX_CACHED_AGENTS)
+def get_research_agent(api_key, serp_api_key, model, temperature, vectorstore_version, _vectorstore):
+    tools = get_tools(api_key, serp_api_key, model, temperature, vectorstore_version, _vectorstore)
+    return build_research_agent(tools, get_llm(api_key, model, temperature))
+
+def get_chat_session():
+    """
+    Return this browser session's chat agent, memory and observation cache.
 
-def insert_research(user_input, introduction, quant_facts, publications, books, prev_research):
-    with sqlite3.connect('MASTER.db') as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO Research (user_input, introduction, quant_facts, publications, books, prev_research)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (user_input, introduction, quant_facts, publications, books, prev_research))
+    The memory (``build_chat_memory``) keeps recent turns verbatim and folds
+    older ones into a rolling summary, so prompts stop growing with the
+    conversation. When the settings or vector store change
+    only the agent is rebuilt; memory and cached observations carry over.
+    """
+    key = (openai_api_key, serp_api_key, MODEL, temperature, st.session_state.embeddings_version)
+    session = st.session_state.chat_session
+    if session is None or session["key"] != key:
+        llm = get_llm(openai_api_key, MODEL, temperature)
+        if session is None:
+            memory = build_chat_memory(llm)
+            observations = {}
+        else:
+            memory, observations = session["memory"], session["observations"]
+        tools = get_tools(
+            openai_api_key, serp_api_key, MODEL, temperature,
+            st.session_state.embeddings_version, st.session_state.embeddings_db
+        )
+        session = {
+            "key": key,
+            "agent": build_chat_agent(memoize_tools(tools, observations), llm, memory),
+            "memory": memory,
+            "observations": observations,
+        }
+        st.session_state.chat_session = session
+    return session
+
+@st.cache_resource
+def get_vectorstore():
+    return Chroma(persist_directory=VECTORSTORE_PATH, embedding_function=get_embeddings())
+
+def set_embeddings_db(vectordb):
+    st.session_state.embeddings_db = vectordb
+    # Every session uses the process-wide store, so they share its cached QA chain and agent
+    st.session_state.embeddings_version = VECTORSTORE_PATH
 
 def generate_research(userInput):
-    global tools
-    llm = ChatOpenAI(api_key=openai_api_key, model="gpt-4", temperature=temperature)
-    wiki = WikipediaAPIWrapper()
-    pubmed = PubmedQueryRun()
-    google_scholar = GoogleScholarQueryRun(serp_api_key=serp_api_key)
-    uniprot = UniprotQueryRun()
-
-    tools = [
-        Tool(
-            name="Wikipedia Research Tool",
-            func=wiki.run,
-            description="Useful for researching information on Wikipedia."
-        ),
-        Tool(
-            name='Pubmed Science and Medical Journal Research Tool',
-            func=pubmed.run,
-            description='Useful for Pubmed science and medical research\nPubMed comprises more than 35 million citations for biomedical literature from MEDLINE, life science journals, and online books. Citations may include links to full text content from PubMed Central and publisher web sites.'
-        ),
-        Tool(
-            name="Google Scholar Search Tool",
-            func=google_scholar.run,
-            description="Useful for getting research article hyperlinks from Google Scholar. It can provide links to the articles as well."
-        ),
-        Tool(
-            name="UniProt Protein Information Tool",
-            func=uniprot.run,
-            description="Useful for getting protein-specific information from UniProt. It can give the function of the protein, organism, amino acid sequence and available PDB structures."
-        )
-    ]
+    runAgent = get_research_agent(
+        openai_api_key, serp_api_key, MODEL, temperature,
+        st.session_state.embeddings_version, st.session_state.embeddings_db
+    )
+    previous_research = None
     if st.session_state.embeddings_db:
-        qa = VectorDBQA.from_chain_type(llm=llm, vectorstore=st.session_state.embeddings_db)
-        tools.append(
-            Tool(
-                name='Vector-Based Previous Research Database Tool',
-                func=qa.run,
-                description='Provides access to previous research results'
-            )
+        qa = get_previous_research_qa(
+            openai_api_key, MODEL, temperature,
+            st.session_state.embeddings_version, st.session_state.embeddings_db
         )
+        previous_research = lambda query, callbacks: qa.run({"query": query}, callbacks=callbacks)
 
-    memory = ConversationBufferMemory(memory_key="chat_history")
-    runAgent = initialize_agent(
-        tools, 
-        llm, 
-        agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION, 
-        verbose=True, 
-        memory=memory, 
-        handle_parsing_errors=True,
-        prefix_prompt="Example responses for each tool:\n"
-                      "Wikipedia Research Tool: 'Information about GLP-1 peptide: Glucagon-like peptide-1 (GLP-1) is a 30-amino acid peptide hormone that plays an important role in glucose metabolism.'\n"
-                      "UniProt Protein Information Tool: 'Protein details: Name, Function, Organism, PDB structures, Sequence.'\n"
-                      "Pubmed Science and Medical Journal Research Tool: 'Recent studies on GLP-1 peptide include... (citation details, brief summary).'\n"
-                      "Google Scholar Search Tool: 'Relevant articles for GLP-1 peptide include... (titles and links).'\n"
-                      "Ensure all responses are formatted as shown in the examples."
-    )
+    run_agent = lambda prompt, callbacks: runAgent({"input": prompt}, callbacks=callbacks)['output']
+    run_planned = None
+    if execution_mode == "Planned":
+        # The agent stays as the fallback for sections whose sources all fail
+        run_planned = build_planned_runner(get_base_tools(serp_api_key), get_llm(openai_api_key, MODEL, temperature), fallback=run_agent)
+
+    sections = research_sections(userInput, run_agent, previous_research, run_planned)
+    handlers = {section.name: StreamHandler() for section in sections}
+    metrics = ReportMetrics(MODEL)
 
     with st.expander("Generative Results", expanded=True):
         st.subheader("User Input:")
         st.write(userInput)
 
-        st.subheader("Introduction:")
-        with st.spinner("Generating Introduction"):
-            intro = runAgent({"input": f'Write an academic introduction about {userInput} with at least three paragraphs.'})
-            st.write(intro['output'])
-
-        st.subheader("Protein Information from UniProt:")
-        with st.spinner("Generating Protein Information"):
-            uniprot_info = runAgent({"input": f'''
-                Provide detailed information about the protein: "{userInput}" from UniProt including function, organism amino acid sequences, and PDB structures. 
-            '''})
-            st.write(uniprot_info['output'])
-
-        st.subheader("Quantitative Facts:")
-        with st.spinner("Generating Statistical Facts"):
-            quantFacts = runAgent({"input": f'''
-                Considering user input: {userInput} and the intro paragraph: {intro['output']} 
-                \nGenerate a list of 3 to 5 quantitative facts about: {userInput}
-                \nOnly return the list of quantitative facts
-            '''})
-            st.write(quantFacts['output'])
-
-        prev_research = ""
-        if st.session_state.embeddings_db:
-            st.subheader("Previous Related Research:")
-            with st.spinner("Researching Previous Research"):
-                qa = VectorDBQA.from_chain_type(llm=llm, vectorstore=st.session_state.embeddings_db)
-                prev_research = qa.run({"query": f'''
-                    \nReferring to previous results and information, write about: {userInput}
-                '''})
-                st.write(prev_research)
-
-        st.subheader("Recent Publications:")
-        with st.spinner("Generating Recent Publications"):
-            papers = runAgent({"input": f'''
-                Consider user input: "{userInput}".
-                \nConsider the intro paragraph: "{intro['output']}",
-                \nConsider these quantitative facts "{quantFacts['output']}"
-                \nNow Generate a list of 4 to 5 recent academic papers relating to {userInput}.
-                \nInclude Titles, Links to the article, Abstracts. 
-            '''})
-            st.write(papers['output'])
-
-        st.subheader("Recommended Books:")
-        with st.spinner("Generating Recommended Books"):
-            readings = runAgent({"input": f'''
-                Consider user input: "{userInput}".
-                \nConsider the intro paragraph: "{intro['output']}",
-                \nConsider these quantitative facts "{quantFacts['output']}"
-                \nNow Generate a list of 5 relevant books to read relating to {userInput}.
-            '''})
-            st.write(readings['output'])
-
-        st.subheader("Research Article Hyperlinks:")
-        with st.spinner("Generating Research Article Hyperlinks"):
-            google_scholar_links = runAgent({"input": f'''
-                Find research articles related to: "{userInput}" on Google Scholar.
-                \nProvide titles and working hyperlinks to the articles.
-            '''})
-            st.write(google_scholar_links['output'])
-
-        insert_research(userInput, intro['output'], quantFacts['output'], papers['output'], readings['output'], prev_research)
-        research_text = [userInput, intro['output'], quantFacts['output'], papers['output'], readings['output'], prev_research]
-        embedding_function = OpenAIEmbeddings()
-        vectordb = Chroma.from_texts(research_text, embedding_function, persist_directory="./chroma_db")
+        # Lay out every section up front so each one can be filled in as soon as it finishes
+        placeholders = {}
+        for section in sections:
+            st.subheader(section.title)
+            placeholders[section.name] = st.empty()
+            placeholders[section.name].caption(f"{section.spinner}...")
+
+        def render_streams():
+            for name, handler in handlers.items():
+                if handler.dirty:
+                    handler.render(placeholders[name])
+
+        def finish_section(section, output):
+            placeholders[section.name].write(output)
+            handlers[section.name].dirty = False
+
+        with st.spinner("Generating Research"):
+            results = run_sections(
+                sections,
+                max_workers=SECTION_WORKERS,
+                on_complete=finish_section,
+                callbacks_for=lambda section: [handlers[section.name], metrics.handler(section.name)],
+                on_tick=render_streams
+            )
+        st.caption(" | ".join(
+            f"{section.title.rstrip(':')}: first token {handlers[section.name].time_to_first_token:.1f}s"
+            for section in sections
+            if handlers[section.name].time_to_first_token is not None
+        ))
+
+        prev_research = results.get("prev_research", "")
+        store = get_research_store()
+        research_id = store.insert_research(userInput, results['intro'], results['quant_facts'], results['papers'], results['books'], prev_research)
+        report = {
+            "user_input": userInput,
+            "introduction": results['intro'],
+            "quant_facts": results['quant_facts'],
+            "publications": results['papers'],
+            "books": results['books'],
+            "prev_research": prev_research,
+        }
+        get_research_index().add_research(research_id, report)
+
+        # Add to the existing collection in place; unchanged chunks are skipped
+        ingest_started = time.perf_counter()
+        vectordb = st.session_state.embeddings_db
+        if vectordb is None:
+            vectordb = get_vectorstore()
+        ingest_research(vectordb, research_id, userInput, report)
         vectordb.persist()
-        st.session_state.embeddings_db = vectordb
+        if st.session_state.embeddings_db is None:
+            set_embeddings_db(vectordb)
+        metrics.record_time("embed_and_persist", time.perf_counter() - ingest_started)
+
+        store.update_metrics(research_id, json.dumps(metrics.to_dict()))
+
+    # Expanders can't be nested, so the timing panel sits below the results
+    render_metrics(metrics)
 
-class Document:
-    def __init__(self, content, topic):
-        self.page_content = content
-        self.metadata = {"Topic": topic}
+def render_metrics(metrics, key="report"):
+    with st.expander("Timing and Cost", expanded=False):
+        st.dataframe(metrics.rows())
+        json_col, openmetrics_col = st.columns(2)
+        json_col.download_button("Export JSON lines", metrics.to_json_lines(), file_name="metrics.jsonl", key=f"{key}_jsonl")
+        openmetrics_col.download_button("Export OpenMetrics", metrics.to_openmetrics(), file_name="metrics.txt", key=f"{key}_openmetrics")
 
 def init_ses_states():
     st.session_state.setdefault("chat_history", [])
+    st.session_state.setdefault("chat_session", None)
+    st.session_state.setdefault("session_id", uuid.uuid4().hex)
     st.session_state.setdefault("prev_chat_history", [])
     st.session_state.setdefault("embeddings_db", None)
+    st.session_state.setdefault("embeddings_version", None)
     st.session_state.setdefault('research', None)
     st.session_state.setdefault("prev_research", None)
     st.session_state.setdefault("books", None)
@@ -212,58 +254,26 @@ def validate_response(response):
     return True
 
 def chat_with_data(user_message):
+    chatAgent = get_chat_session()["agent"]
 
-    llm = ChatOpenAI(api_key=openai_api_key, model="gpt-4", temperature=temperature)
-
-    wiki = WikipediaAPIWrapper()
-    pubmed = PubmedQueryRun()
-    google_scholar = GoogleScholarQueryRun(api_wrapper=GoogleScholarAPIWrapper())
-    uniprot = UniprotQueryRun()
-
-    tools = [
-        Tool(
-            name="Wikipedia Research Tool",
-            func=wiki.run,
-            description="Useful for researching information on Wikipedia"
-        ),
-        Tool(
-            name='Pubmed Science and Medical Journal Research Tool',
-            func=pubmed.run,
-            description='Useful for Pubmed science and medical research\nPubMed comprises more than 35 million citations for biomedical literature from MEDLINE, life science journals, and online books. Citations may include links to full text content from PubMed Central and publisher web sites.'
-        ),
-        Tool(
-            name="Google Scholar Search Tool",
-            func=google_scholar.run,
-            description="Useful for getting research article hyperlinks from Google Scholar"
-        ),
-        Tool(
-            name="UniProt Protein Information Tool",
-            func=uniprot.run,
-            description="Useful for getting protein-specific information from UniProt"
-        )
-    ]
-    if st.session_state.embeddings_db:
-        qa = VectorDBQA.from_chain_type(llm=llm, vectorstore=st.session_state.embeddings_db)
-        tools.append(
-            Tool(
-                name='Vector-Based Previous Research Database Tool',
-                func=qa.run,
-                description='Provides access to previous research results'
-            )
-        )
-
-    memory = ConversationBufferMemory(memory_key="chat_history")
-    chatAgent = initialize_agent(tools, llm, agent=AgentType.CONVERSATIONAL_REACT_DESCRIPTION, verbose=True, memory=memory, handle_parsing_errors=True)
-
+    placeholder = st.empty()
+    handler = StreamHandler(placeholder=placeholder)
+    metrics = ReportMetrics(MODEL)
     try:
-        # Use chatAgent to respond to user message
-        response = chatAgent({"input": user_message})
+        # Use chatAgent to respond to user message, streaming tokens into the placeholder
+        response = chatAgent({"input": user_message}, callbacks=[handler, metrics.handler("chat")])
 
         # Validate the response format
         if not validate_response(response):
             raise ValueError("Invalid response format received from the agent.")
 
-        st.write(response['output'])
+        placeholder.write(response['output'])
+        render_metrics(metrics, key="chat")
+        st.session_state.chat_history.append((user_message, response['output']))
+        get_research_store().insert_messages(
+            st.session_state.session_id,
+            [("user", user_message), ("assistant", response['output'])]
+        )
     except ValueError as ve:
         st.error(f"ValueError: {ve}")
     except Exception as e:
@@ -271,13 +281,14 @@ def chat_with_data(user_message):
 
 # Main function to run the Streamlit app
 def main():
-    create_research_db()
-    llm = ChatOpenAI(api_key=openai_api_key, model="gpt-4", temperature=temperature)
-    embedding_function = OpenAIEmbeddings()
+    get_research_store()
     init_ses_states()
-    if os.path.exists("./chroma_db"):
-        st.session_state.embeddings_db = Chroma(persist_directory="./chroma_db", embedding_function=embedding_function)
+    # Open the persisted store once per process rather than per session or rerun
+    if st.session_state.embeddings_db is None and os.path.exists(VECTORSTORE_PATH):
+        set_embeddings_db(get_vectorstore())
     st.header("GPT-4o Based Langchain Research Bot")
+    with st.sidebar.expander("Response Cache"):
+        st.json({"tools": get_response_cache().stats(), "embeddings": get_embeddings().stats()})
     deploy_tab, prev_tab = st.tabs(["Generate Research", "Previous Research"])
     with deploy_tab:
         userInput = st.text_area(label="User Input")
@@ -285,35 +296,69 @@ def main():
             generate_research(userInput)
 
         st.subheader("Chat with Data")
+        for previous_message, previous_response in st.session_state.chat_history:
+            st.markdown(f"**You:** {previous_message}")
+            st.markdown(previous_response)
         user_message = st.text_input(label="User Message", key="um1")
         if st.button("Submit Message") and user_message:
             chat_with_data(user_message)
 
     with prev_tab:
-        st.dataframe(read_research_table())
-        selected_input = st.selectbox(label="Previous User Inputs", options=[i for i in read_research_table().user_input])
-        if st.button("Render Research") and selected_input:
+        store = get_research_store()
+        # Keyset pagination: a stack of the research_id each visited page started before
+        st.session_state.setdefault("research_page_cursors", [None])
+        st.session_state.setdefault("research_page_has_older", False)
+        st.session_state.setdefault("research_page_last_id", None)
+        cursors = st.session_state.research_page_cursors
+        newer_col, older_col = st.columns(2)
+        if newer_col.button("Newer", disabled=len(cursors) == 1):
+            cursors.pop()
+        if older_col.button("Older", disabled=not st.session_state.research_page_has_older):
+            cursors.append(st.session_state.research_page_last_id)
+
+        rows = store.list_research(before_id=cursors[-1], limit=RESEARCH_PAGE_SIZE + 1)
+        st.session_state.research_page_has_older = len(rows) > RESEARCH_PAGE_SIZE
+        rows = rows[:RESEARCH_PAGE_SIZE]
+        st.session_state.research_page_last_id = rows[-1]["research_id"] if rows else None
+
+        search_text = st.text_input(label="Search Previous Research")
+        if search_text:
+            rows = store.search_research(search_text)
+            if store.search_is_limited(search_text):
+                st.caption(
+                    f"More than {SEARCH_CANDIDATES:,} reports match; only the newest {SEARCH_CANDIDATES:,} were ranked. "
+                    "Add terms to reach older reports."
+                )
+            for row in rows:
+                st.markdown(f"**{row['user_input']}** ({row['created_at'] or 'undated'})  \n{row['snippet']}")
+        else:
+            st.dataframe(rows)
+        labels = {row["research_id"]: row["user_input"] for row in rows}
+        selected_id = st.selectbox(label="Previous User Inputs", options=list(labels), format_func=labels.get)
+        if st.button("Render Research") and selected_id is not None:
             with st.expander("Rendered Previous Research", expanded=True):
-                selected_df = read_research_table()
-                selected_df = selected_df[selected_df.user_input == selected_input].reset_index(drop=True)
+                report = store.get_research(selected_id)
 
                 st.subheader("User Input:")
-                st.write(selected_df.user_input[0])
+                st.write(report["user_input"])
 
                 st.subheader("Introduction:")
-                st.write(selected_df.introduction[0])
+                st.write(report["introduction"])
 
                 st.subheader("Quantitative Facts:")
-                st.write(selected_df.quant_facts[0])
+                st.write(report["quant_facts"])
 
                 st.subheader("Previous Related AI Research:")
-                st.write(selected_df.prev_research[0])
+                st.write(report["prev_research"])
 
                 st.subheader("Recent Publications:")
-                st.write(selected_df.publications[0])
+                st.write(report["publications"])
 
                 st.subheader("Recommended Books:")
-                st.write(selected_df.books[0])
+                st.write(report["books"])
+
+            if report["metrics"]:
+                render_metrics(ReportMetrics.from_dict(json.loads(report["metrics"])), key="previous")
 
 if __name__ == '__main__':
     load_dotenv()
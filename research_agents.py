@@ -0,0 +1,397 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from langchain.agents import AgentType, Tool, initialize_agent
+from langchain.memory import ConversationBufferMemory, ConversationSummaryBufferMemory
+from langchain_community.tools.google_scholar.tool import GoogleScholarQueryRun
+from langchain_community.tools.pubmed.tool import PubmedQueryRun
+from langchain_community.tools.uniprot.tool import UniprotQueryRun
+from langchain_community.utilities import WikipediaAPIWrapper
+from langchain_community.utilities.google_scholar import GoogleScholarAPIWrapper
+from langchain_community.utilities.pubmed import PubMedAPIWrapper
+from langchain_community.utilities.uniprot import UniProtAPIWrapper
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.runnables import RunnableLambda
+
+from research_cache import ResponseCache
+
+# Seconds each tool's responses stay fresh in the response cache
+TOOL_CACHE_TTLS = {
+    "Wikipedia Research Tool": 7 * 24 * 60 * 60,
+    "Pubmed Science and Medical Journal Research Tool": 24 * 60 * 60,
+    "Google Scholar Search Tool": 7 * 24 * 60 * 60,
+    "uniprot.search_proteins": 7 * 24 * 60 * 60,
+    "uniprot.get_protein_details": 30 * 24 * 60 * 60,
+}
+
+RESEARCH_AGENT_PREFIX = (
+    "Example responses for each tool:\n"
+    "Wikipedia Research Tool: 'Information about GLP-1 peptide: Glucagon-like peptide-1 (GLP-1) is a 30-amino acid peptide hormone that plays an important role in glucose metabolism.'\n"
+    "UniProt Protein Information Tool: 'Protein details: Name, Function, Organism, PDB structures, Sequence.'\n"
+    "Pubmed Science and Medical Journal Research Tool: 'Recent studies on GLP-1 peptide include... (citation details, brief summary).'\n"
+    "Google Scholar Search Tool: 'Relevant articles for GLP-1 peptide include... (titles and links).'\n"
+    "Ensure all responses are formatted as shown in the examples."
+)
+
+PLANNED_SECTION_PROMPT = """Complete the task below using the research notes gathered for it.
+Take facts, titles and links from the notes; do not invent citations or URLs that are not in them.
+
+Research notes:
+{observations}
+
+Task: {task}"""
+
+# How the research tools report an error or an empty search instead of raising
+TOOL_FAILURE_PREFIXES = (
+    "PubMed exception",
+    "No good PubMed Result",
+    "No good Wikipedia Search Result",
+    "No good Google Scholar Result",
+    "UniProt exception",
+    "No good UniProt Result",
+)
+
+# Answers from the reports stored so far, so they change as reports are added
+PREVIOUS_RESEARCH_TOOL = 'Vector-Based Previous Research Database Tool'
+
+# Token budget for verbatim chat turns before older ones are summarized
+CHAT_MEMORY_TOKENS = 1500
+
+# USD per 1K prompt / completion tokens
+MODEL_PRICES = {
+    "gpt-4": (0.03, 0.06),
+    "gpt-4o": (0.005, 0.015),
+}
+
+
+def build_response_cache(path='CACHE.db'):
+    return ResponseCache(path, ttls=TOOL_CACHE_TTLS)
+
+
+def tool_failed(output):
+    """True when a tool's output is its error or no-result message rather than an answer."""
+    return isinstance(output, str) and output.strip().startswith(TOOL_FAILURE_PREFIXES)
+
+
+def tool_succeeded(output):
+    return not tool_failed(output)
+
+
+class RateLimiter:
+    """Token bucket shared by every thread calling one upstream."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def wrap(self, func):
+        def limited(*args, **kwargs):
+            self.acquire()
+            return func(*args, **kwargs)
+        return limited
+
+
+class RateLimitedPubMedAPIWrapper(PubMedAPIWrapper):
+    """PubMed wrapper that waits on ``rate_limiter`` before the esearch and every efetch request."""
+
+    rate_limiter: Any = None
+
+    def lazy_load(self, query):
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        yield from super().lazy_load(query)
+
+    def retrieve_article(self, uid, webenv):
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        return super().retrieve_article(uid, webenv)
+
+
+class StreamHandler(BaseCallbackHandler):
+    """
+    Collect streamed LLM tokens and tool calls for one section or chat reply.
+
+    With a placeholder the text is redrawn from inside the callback, which is
+    only safe when the agent runs on the script thread. Concurrent sections
+    are created without one and rendered from the script thread instead.
+    """
+
+    def __init__(self, placeholder=None, min_interval=0.1):
+        self.placeholder = placeholder
+        self.min_interval = min_interval
+        self.chunks = []
+        self.dirty = False
+        self.started_at = time.perf_counter()
+        self.first_token_at = None
+        self.rendered_at = 0.0
+
+    @property
+    def time_to_first_token(self):
+        if self.first_token_at is None:
+            return None
+        return self.first_token_at - self.started_at
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        if self.chunks:
+            self._append("\n\n")
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self.on_llm_start(serialized, [], **kwargs)
+
+    def on_llm_new_token(self, token, **kwargs):
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+        self._append(token)
+
+    def on_tool_start(self, serialized, input_str, **kwargs):
+        self._append(f"\n\n> Calling **{serialized.get('name', 'tool')}** with `{input_str}`\n\n")
+
+    def on_tool_end(self, output, **kwargs):
+        observation = str(output)
+        if len(observation) > 300:
+            observation = observation[:300] + "..."
+        self._append(f"> Observation: {observation}\n\n")
+
+    def _append(self, text):
+        self.chunks.append(text)
+        self.dirty = True
+        if self.placeholder is not None and time.perf_counter() - self.rendered_at >= self.min_interval:
+            self.render(self.placeholder)
+
+    def render(self, placeholder):
+        self.dirty = False
+        self.rendered_at = time.perf_counter()
+        placeholder.markdown("".join(self.chunks) + "▌")
+
+
+class RateLimitHandler(BaseCallbackHandler):
+    """Block each LLM request until the upstream's rate limiter allows it."""
+
+    def __init__(self, limiter):
+        self.limiter = limiter
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        self.limiter.acquire()
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self.limiter.acquire()
+
+
+class UsageHandler(BaseCallbackHandler):
+    """Total the token usage OpenAI reports for non-streaming calls."""
+
+    def __init__(self, model):
+        self.model = model
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._lock = threading.Lock()
+
+    def on_llm_end(self, response, **kwargs):
+        usage = (response.llm_output or {}).get("token_usage", {})
+        with self._lock:
+            self.prompt_tokens += usage.get("prompt_tokens", 0)
+            self.completion_tokens += usage.get("completion_tokens", 0)
+
+    @property
+    def cost(self):
+        prompt_price, completion_price = MODEL_PRICES.get(self.model, (0.0, 0.0))
+        return (self.prompt_tokens * prompt_price + self.completion_tokens * completion_price) / 1000
+
+
+def build_base_tools(serp_api_key, cache, limiters=None, request_hook=None, wrappers=None, uniprot_options=None):
+    """
+    Build the four research tools, with responses cached in ``cache``.
+
+    Error and no-result messages are returned but never cached.
+
+    ``limiters`` optionally maps ``"ncbi"``, ``"serpapi"`` and ``"uniprot"``
+    to a ``RateLimiter``; cache hits never wait on a limiter. PubMed and
+    UniProt are limited per HTTP request inside their wrappers rather than
+    per tool call, as one call makes a search plus a request per result.
+    ``request_hook`` is passed to the UniProt wrapper to observe those requests.
+
+    ``wrappers`` replaces the ``"wikipedia"``, ``"pubmed"`` or
+    ``"google_scholar"`` API wrappers, and ``uniprot_options`` adds
+    ``UniProtAPIWrapper`` fields such as ``base_url_search``; the offline
+    benchmark uses both to point the tools at a local stub server.
+    """
+    limiters = limiters or {}
+    wrappers = wrappers or {}
+
+    def limit(upstream, func):
+        return limiters[upstream].wrap(func) if upstream in limiters else func
+
+    wiki = wrappers.get("wikipedia") or WikipediaAPIWrapper()
+    pubmed_wrapper = wrappers.get("pubmed") or PubMedAPIWrapper()
+    pubmed = PubmedQueryRun(api_wrapper=RateLimitedPubMedAPIWrapper(
+        **pubmed_wrapper.dict(exclude={"parse", "rate_limiter"}), rate_limiter=limiters.get("ncbi")
+    ))
+    google_scholar = GoogleScholarQueryRun(
+        api_wrapper=wrappers.get("google_scholar") or GoogleScholarAPIWrapper(serp_api_key=serp_api_key)
+    )
+    uniprot = UniprotQueryRun(api_wrapper=UniProtAPIWrapper(
+        cache=cache, rate_limiter=limiters.get("uniprot"), request_hook=request_hook, **(uniprot_options or {})
+    ))
+
+    return [
+        Tool(
+            name="Wikipedia Research Tool",
+            func=cache.cached("Wikipedia Research Tool", wiki.run, tool_succeeded),
+            description="Useful for researching information on Wikipedia."
+        ),
+        Tool(
+            name='Pubmed Science and Medical Journal Research Tool',
+            func=cache.cached('Pubmed Science and Medical Journal Research Tool', pubmed.run, tool_succeeded),
+            description='Useful for Pubmed science and medical research\nPubMed comprises more than 35 million citations for biomedical literature from MEDLINE, life science journals, and online books. Citations may include links to full text content from PubMed Central and publisher web sites.'
+        ),
+        Tool(
+            name="Google Scholar Search Tool",
+            func=cache.cached("Google Scholar Search Tool", limit("serpapi", google_scholar.run), tool_succeeded),
+            description="Useful for getting research article hyperlinks from Google Scholar. It can provide links to the articles as well."
+        ),
+        Tool(
+            name="UniProt Protein Information Tool",
+            func=uniprot.run,
+            description="Useful for getting protein-specific information from UniProt. It can give the function of the protein, organism, amino acid sequence and available PDB structures."
+        )
+    ]
+
+
+def memoize_tools(tools, observations, exclude=(PREVIOUS_RESEARCH_TOOL,)):
+    """
+    Return copies of ``tools`` whose results are memoized in the ``observations`` dict.
+
+    Used for a chat session so follow-up questions reuse identical lookups
+    without going back to the response cache or upstream. Tools named in
+    ``exclude`` are returned as they are, and failures are never memoized.
+    """
+    def memoized(name, func):
+        def run(query):
+            key = (name, " ".join(str(query).lower().split()))
+            if key in observations:
+                return observations[key]
+            output = func(query)
+            if tool_succeeded(output):
+                observations[key] = output
+            return output
+        return run
+
+    return [
+        tool if tool.name in exclude else
+        Tool(name=tool.name, func=memoized(tool.name, tool.func), description=tool.description)
+        for tool in tools
+    ]
+
+
+def previous_research_tool(qa):
+    return Tool(
+        name=PREVIOUS_RESEARCH_TOOL,
+        func=qa.run,
+        description='Provides access to previous research results'
+    )
+
+
+def build_planned_runner(tools, llm, fallback=None):
+    """
+    Return ``run(prompt, sources, callbacks)`` for sections whose tools are known up front.
+
+    Each ``(tool name, query)`` in ``sources`` is called directly and in
+    parallel, then one LLM call formats the observations, instead of the
+    agent spending a round trip per tool choice. A source fails when its tool
+    raises or returns an error or no-result message; failed sources are left
+    out of the notes. When every source fails and ``fallback`` is given,
+    ``fallback(prompt, callbacks)`` answers instead.
+    """
+    tools_by_name = {tool.name: tool for tool in tools}
+
+    def gather(inputs, config):
+        sources = inputs["sources"]
+        callbacks = config.get("callbacks")
+
+        def call(source):
+            name, query = source
+            try:
+                return tools_by_name[name].run(query, callbacks=callbacks)
+            except Exception as ex:
+                return ex
+
+        if sources:
+            with ThreadPoolExecutor(max_workers=len(sources)) as executor:
+                outputs = list(executor.map(call, sources))
+        else:
+            outputs = []
+        notes = [
+            f"{name} ({query}):\n{output}"
+            for (name, query), output in zip(sources, outputs)
+            if not isinstance(output, Exception) and not tool_failed(output)
+        ]
+        if sources and not notes:
+            return None
+        prompt = PLANNED_SECTION_PROMPT.format(observations="\n\n".join(notes) or "(none)", task=inputs["prompt"])
+        return llm.invoke(prompt, config={"callbacks": callbacks}).content
+
+    # Runs as one chain so callbacks see the section's wall time and nested tool/LLM runs
+    chain = RunnableLambda(gather).with_config(run_name="PlannedSection")
+
+    def run(prompt, sources, callbacks):
+        output = chain.invoke({"prompt": prompt, "sources": sources}, config={"callbacks": callbacks})
+        if output is None:
+            if fallback is None:
+                raise RuntimeError(f"All sources failed: {', '.join(name for name, _ in sources)}")
+            return fallback(prompt, callbacks)
+        return output
+
+    return run
+
+
+def build_research_agent(tools, llm):
+    # No memory: the zero-shot prompt never reads chat_history, and sections
+    # share this executor concurrently
+    return initialize_agent(
+        tools,
+        llm,
+        agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
+        verbose=True,
+        handle_parsing_errors=True,
+        prefix_prompt=RESEARCH_AGENT_PREFIX
+    )
+
+
+def build_chat_memory(llm, max_token_limit=CHAT_MEMORY_TOKENS):
+    """
+    Chat memory that keeps recent turns verbatim and folds older ones into a rolling summary.
+
+    Once the verbatim turns exceed ``max_token_limit`` prompts stop growing
+    with the conversation.
+    """
+    return ConversationSummaryBufferMemory(llm=llm, memory_key="chat_history", max_token_limit=max_token_limit)
+
+
+def build_chat_agent(tools, llm, memory=None):
+    if memory is None:
+        memory = ConversationBufferMemory(memory_key="chat_history")
+    return initialize_agent(
+        tools,
+        llm,
+        agent=AgentType.CONVERSATIONAL_REACT_DESCRIPTION,
+        verbose=True,
+        memory=memory,
+        handle_parsing_errors=True
+    )
@@ -0,0 +1,35 @@
+"""
+Where the app's chat model, embeddings and research tools come from.
+
+main.py builds them through ``get_backends()``, so the offline benchmark can
+swap in local stand-ins with ``set_backends`` instead of calling OpenAI,
+SerpAPI, NCBI, Wikipedia and UniProt.
+"""
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+
+
+class Backends:
+    """The live services; subclass and override to point the app elsewhere."""
+
+    def chat_model(self, api_key, model, temperature):
+        return ChatOpenAI(api_key=api_key, model=model, temperature=temperature, streaming=True)
+
+    def embeddings(self):
+        return OpenAIEmbeddings()
+
+    def tool_options(self):
+        """Extra ``build_base_tools`` arguments, such as ``wrappers`` or ``uniprot_options``."""
+        return {}
+
+
+_backends = Backends()
+
+
+def get_backends():
+    return _backends
+
+
+def set_backends(backends):
+    """Use ``backends`` for resources built from now on; cached ones are not rebuilt."""
+    global _backends
+    _backends = backends
@@ -0,0 +1,217 @@
+"""
+Generate research reports for a panel of targets without the Streamlit UI.
+
+    python -m research_batch batch targets.csv --workers 4
+
+Targets are read from the first column of the CSV (an optional header row of
+``target``/``topic``/``user_input``/``protein`` is skipped). Completed sections
+are checkpointed to MASTER.db, so re-running the same command after a crash
+resumes where it stopped; targets that already have a report are skipped.
+A report's checkpoints are only dropped once its chunks are embedded, so a
+report saved just before a crash is embedded on the next run instead.
+"""
+import argparse
+import csv
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from dotenv import load_dotenv
+from langchain_community.vectorstores import Chroma
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+
+from research_agents import (
+    RateLimiter,
+    RateLimitHandler,
+    UsageHandler,
+    build_base_tools,
+    build_planned_runner,
+    build_research_agent,
+    build_response_cache,
+)
+from research_cache import CachedEmbeddings
+from research_pipeline import ingest_reports, research_sections, run_sections
+from research_store import ResearchStore
+
+# Requests per second allowed to each upstream, shared by all workers
+DEFAULT_RATE_LIMITS = {
+    "openai": 3.0,
+    "serpapi": 1.0,
+    "ncbi": 3.0,
+    "uniprot": 10.0,
+}
+
+HEADER_NAMES = {"target", "topic", "user_input", "protein"}
+
+# The sections insert_research stores; the app's display-only sections are not run
+SAVED_SECTIONS = ("intro", "quant_facts", "papers", "books")
+
+
+def read_targets(path):
+    with open(path, newline="") as f:
+        rows = [row for row in csv.reader(f) if row and row[0].strip()]
+    if rows and rows[0][0].strip().lower() in HEADER_NAMES:
+        rows = rows[1:]
+    return list(dict.fromkeys(row[0].strip() for row in rows))
+
+
+def research_topic(topic, agent, store, callbacks, section_workers, planner=None):
+    run_agent = lambda prompt, section_callbacks: agent({"input": prompt}, callbacks=callbacks + section_callbacks)['output']
+    run_planned = None
+    if planner is not None:
+        run_planned = lambda prompt, sources, section_callbacks: planner(prompt, sources, callbacks + section_callbacks)
+    sections = [
+        section for section in research_sections(topic, run_agent, run_planned=run_planned)
+        if section.name in SAVED_SECTIONS
+    ]
+    return run_sections(
+        sections,
+        max_workers=section_workers,
+        completed=store.load_checkpoints(topic),
+        on_complete=lambda section, output: store.save_checkpoint(topic, section.name, output)
+    )
+
+
+def report_sections(topic, introduction, quant_facts, publications, books):
+    return {
+        "user_input": topic,
+        "introduction": introduction,
+        "quant_facts": quant_facts,
+        "publications": publications,
+        "books": books,
+    }
+
+
+def ingest_and_clear(store, vectordb, reports):
+    """Embed ``(research_id, topic, sections)`` reports, then drop the checkpoints they replace."""
+    ingest_reports(vectordb, reports)
+    vectordb.persist()
+    for _, topic, _ in reports:
+        store.clear_checkpoints(topic)
+
+
+def resume_ingest(store, vectordb, targets):
+    """
+    Embed reports that were saved but not ingested before a crash, and return their topics.
+
+    Such a report still has checkpoints; chunks that did make it into the
+    collection are skipped by ``ingest_reports``.
+    """
+    reports = []
+    for topic in targets:
+        research_id = store.find_research_id(topic)
+        if research_id is None or not store.load_checkpoints(topic):
+            continue
+        row = store.get_research(research_id)
+        reports.append((research_id, topic, report_sections(
+            topic, row["introduction"], row["quant_facts"], row["publications"], row["books"]
+        )))
+    if reports:
+        ingest_and_clear(store, vectordb, reports)
+    return [topic for _, topic, _ in reports]
+
+
+def run_batch(targets, workers=4, chunk_size=20, section_workers=2, rate_limits=None,
+              model="gpt-4", temperature=0.2, mode="planned", db_path="MASTER.db", persist_directory="./chroma_db"):
+    store = ResearchStore(db_path)
+    cache = build_response_cache('CACHE.db')
+    limiters = {name: RateLimiter(rate) for name, rate in {**DEFAULT_RATE_LIMITS, **(rate_limits or {})}.items()}
+    usage = UsageHandler(model)
+    callbacks = [RateLimitHandler(limiters["openai"]), usage]
+
+    llm = ChatOpenAI(model=model, temperature=temperature)
+    tools = build_base_tools(os.getenv("SERP_API_KEY", ""), cache, limiters)
+    agent = build_research_agent(tools, llm)
+    # The planner's fallback is the agent itself; research_topic adds the shared callbacks to both
+    planner = None
+    if mode == "planned":
+        planner = build_planned_runner(
+            tools, llm, fallback=lambda prompt, section_callbacks: agent({"input": prompt}, callbacks=section_callbacks)['output']
+        )
+    vectordb = Chroma(
+        persist_directory=persist_directory,
+        embedding_function=CachedEmbeddings(OpenAIEmbeddings(), path='CACHE.db')
+    )
+
+    resumed = resume_ingest(store, vectordb, targets)
+    if resumed:
+        print(f"Embedded {len(resumed)} reports saved before an interrupted run")
+    todo = [topic for topic in targets if store.find_research_id(topic) is None]
+    print(f"{len(targets)} targets, {len(targets) - len(todo)} already researched, {len(todo)} to run")
+
+    started = time.perf_counter()
+    completed, failed = 0, []
+    for start in range(0, len(todo), chunk_size):
+        reports = []
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(research_topic, topic, agent, store, callbacks, section_workers, planner): topic
+                for topic in todo[start:start + chunk_size]
+            }
+            for future in as_completed(futures):
+                topic = futures[future]
+                try:
+                    results = future.result()
+                except Exception as ex:
+                    failed.append(topic)
+                    print(f"[failed] {topic}: {ex}")
+                    continue
+                research_id = store.insert_research(
+                    topic, results['intro'], results['quant_facts'], results['papers'], results['books'], ""
+                )
+                reports.append((research_id, topic, report_sections(
+                    topic, results['intro'], results['quant_facts'], results['papers'], results['books']
+                )))
+                print(f"[done] {topic}")
+
+        # Embed the whole chunk in one batch
+        ingest_and_clear(store, vectordb, reports)
+        completed += len(reports)
+
+    elapsed = time.perf_counter() - started
+    scholar = cache.stats().get("Google Scholar Search Tool", {})
+    print(f"Completed {completed} reports in {elapsed / 60:.1f} min ({len(failed)} failed)")
+    if completed:
+        print(f"Throughput: {completed / (elapsed / 3600):.1f} reports/hour")
+        print(
+            f"OpenAI: {usage.prompt_tokens} prompt + {usage.completion_tokens} completion tokens, "
+            f"${usage.cost:.2f} total, ${usage.cost / completed:.3f} per report"
+        )
+        print(f"SerpAPI calls: {scholar.get('misses', 0)} ({scholar.get('misses', 0) / completed:.1f} per report)")
+    return failed
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(prog="python -m research_batch")
+    commands = parser.add_subparsers(dest="command", required=True)
+    batch = commands.add_parser("batch", help="generate reports for every target in a CSV file")
+    batch.add_argument("targets", help="CSV file with one target per row")
+    batch.add_argument("--workers", type=int, default=4, help="targets researched concurrently")
+    batch.add_argument("--section-workers", type=int, default=2, help="sections run concurrently per target")
+    batch.add_argument("--chunk-size", type=int, default=20, help="targets per embedding/checkpoint chunk")
+    batch.add_argument("--model", default="gpt-4")
+    batch.add_argument("--temperature", type=float, default=0.2)
+    batch.add_argument(
+        "--mode", choices=["planned", "agent"], default="planned",
+        help="call each section's tools directly (planned) or let the ReAct agent choose them"
+    )
+    for upstream, rate in DEFAULT_RATE_LIMITS.items():
+        batch.add_argument(f"--{upstream}-rps", type=float, default=rate, help=f"max {upstream} requests per second")
+    args = parser.parse_args()
+
+    failed = run_batch(
+        read_targets(args.targets),
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        section_workers=args.section_workers,
+        rate_limits={upstream: getattr(args, f"{upstream}_rps") for upstream in DEFAULT_RATE_LIMITS},
+        model=args.model,
+        temperature=args.temperature,
+        mode=args.mode,
+    )
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
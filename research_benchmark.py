@@ -0,0 +1,244 @@
+"""
+Benchmark the app end to end without network access or API keys.
+
+    python -m research_benchmark --iterations 3 --json baseline.json
+
+main.py runs headless under Streamlit's AppTest with its backends swapped
+for the stand-ins in research_fakes: a fake chat model with configurable
+latency and token rate, hashing embeddings, and a local HTTP server that
+replays ``benchmark_fixtures/`` for UniProt, PubMed, SerpAPI and Wikipedia.
+Each iteration starts from an empty working directory (no MASTER.db,
+CACHE.db or chroma_db), generates one report and then sends one chat
+message. The p50/p95 latency and calls per upstream are reported per
+scenario, and ``--json`` saves them as a baseline to compare later changes
+against.
+
+``--memory`` also reports the peak Python memory each scenario allocates
+on top of what is already in use. It traces every allocation, which slows
+the app down, so it runs as a separate pass after the timed one and its
+latencies are discarded.
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from pathlib import Path
+
+import streamlit as st
+from chromadb.api.client import SharedSystemClient
+from streamlit.testing.v1 import AppTest
+
+from research_backends import Backends, set_backends
+from research_fakes import FIXTURES_DIR, CallCounter, OfflineBackends, StubServer
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+MAIN_PATH = Path(__file__).resolve().parent / "main.py"
+
+# --mode values and the matching "Section Execution" sidebar option
+MODES = {"planned": "Planned", "agent": "Agent"}
+
+
+def percentile(values, q):
+    """Nearest-rank percentile, so small samples report a latency that was actually observed."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def labelled(elements, label):
+    for element in elements:
+        if element.label == label:
+            return element
+    raise LookupError(f"No widget labelled {label!r}")
+
+
+def check_errors(at, scenario):
+    problems = [exception.message for exception in at.exception] + [error.value for error in at.error]
+    if problems:
+        raise RuntimeError(f"{scenario} failed: {problems[0]}")
+
+
+def reset_formatted_selectboxes(at):
+    """
+    Work around AppTest sending a ``format_func`` selectbox's raw value where it expects a label.
+
+    Such a selectbox (Previous User Inputs) is left on its first option, as
+    the benchmark never changes it.
+    """
+    for select in at.selectbox:
+        if select.options and str(select.value) not in select.options:
+            select.select_index(0)
+
+
+def timed_run(at, scenario, counter, samples, timeout):
+    """
+    Rerun the app after a widget change and record the run's latency and calls.
+
+    While tracemalloc is tracing, the run's peak memory is recorded too, as
+    the growth over what was already allocated when the run started, so
+    memory kept from earlier scenarios isn't counted again.
+    """
+    before = counter.snapshot()
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    at.run(timeout=timeout)
+    seconds = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1] - baseline if tracing else None
+    check_errors(at, scenario)
+    after = counter.snapshot()
+    samples[scenario].append({
+        "seconds": seconds,
+        "calls": {upstream: after[upstream] - before.get(upstream, 0) for upstream in after},
+        "peak_bytes": peak,
+    })
+
+
+def run_iteration(mode, topic, message, counter, samples, timeout):
+    with tempfile.TemporaryDirectory(prefix="research_benchmark_", ignore_cleanup_errors=True) as workdir:
+        os.chdir(workdir)
+        # Cached resources hold connections to the previous iteration's databases,
+        # and Chroma keeps one client per persist path, which is "./chroma_db" every time
+        st.cache_resource.clear()
+        SharedSystemClient.clear_system_cache()
+        at = AppTest.from_file(str(MAIN_PATH), default_timeout=timeout)
+        at.run()
+        check_errors(at, "startup")
+
+        labelled(at.radio, "Section Execution").set_value(MODES[mode])
+        labelled(at.text_area, "User Input").input(topic)
+        labelled(at.button, "Generate Report").click()
+        timed_run(at, f"generate_research[{mode}]", counter, samples, timeout)
+
+        reset_formatted_selectboxes(at)
+        labelled(at.text_input, "User Message").input(message)
+        labelled(at.button, "Submit Message").click()
+        timed_run(at, "chat_with_data", counter, samples, timeout)
+
+
+def summarize(samples, memory_samples=None):
+    summary = {}
+    for scenario, runs in samples.items():
+        seconds = [run["seconds"] for run in runs]
+        calls = defaultdict(int)
+        for run in runs:
+            for upstream, count in run["calls"].items():
+                calls[upstream] += count
+        summary[scenario] = {
+            "runs": len(runs),
+            "p50_seconds": percentile(seconds, 50),
+            "p95_seconds": percentile(seconds, 95),
+            "calls_per_run": {upstream: count / len(runs) for upstream, count in sorted(calls.items()) if count},
+            "peak_mib": None,
+        }
+        if memory_samples and memory_samples.get(scenario):
+            summary[scenario]["peak_mib"] = max(run["peak_bytes"] for run in memory_samples[scenario]) / 2 ** 20
+    return summary
+
+
+def run_benchmark(iterations=3, modes=("planned", "agent"), topic="GLP-1",
+                  message="What are the main clinical uses of GLP-1 receptor agonists?",
+                  llm_latency=0.5, tokens_per_second=40.0, answer_words=80, upstream_latency=0.05,
+                  timeout=300.0, fixtures=FIXTURES_DIR, memory=False):
+    """
+    Run ``iterations`` report + chat round trips per mode against the stand-ins and summarize them.
+
+    With ``memory``, one more round trip per mode runs under tracemalloc
+    for the peak memory figures only.
+    """
+    counter = CallCounter()
+    samples = defaultdict(list)
+    memory_samples = defaultdict(list)
+    cwd = os.getcwd()
+    try:
+        with StubServer(fixtures, counter, latency=upstream_latency) as server:
+            set_backends(OfflineBackends(server.url, counter, llm_latency, tokens_per_second, answer_words))
+            for mode in modes:
+                for _ in range(iterations):
+                    run_iteration(mode, topic, message, counter, samples, timeout)
+            if memory:
+                tracemalloc.start()
+                try:
+                    for mode in modes:
+                        run_iteration(mode, topic, message, counter, memory_samples, timeout)
+                finally:
+                    tracemalloc.stop()
+    finally:
+        os.chdir(cwd)
+        set_backends(Backends())
+        st.cache_resource.clear()
+    return summarize(samples, memory_samples)
+
+
+def peak_rss_mib():
+    if resource is None:
+        return None
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / 2 ** 20 if sys.platform == "darwin" else maxrss / 2 ** 10
+
+
+def print_summary(summary):
+    print(f"{'scenario':<30} {'runs':>4} {'p50 s':>7} {'p95 s':>7} {'peak MiB':>9}  calls per run")
+    for scenario, stats in summary.items():
+        calls = " ".join(f"{upstream}={count:g}" for upstream, count in stats["calls_per_run"].items())
+        peak = "-" if stats["peak_mib"] is None else f"{stats['peak_mib']:.1f}"
+        print(
+            f"{scenario:<30} {stats['runs']:>4} {stats['p50_seconds']:>7.2f} {stats['p95_seconds']:>7.2f} "
+            f"{peak:>9}  {calls}"
+        )
+    rss = peak_rss_mib()
+    if rss is not None:
+        print(f"Process peak RSS: {rss:.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m research_benchmark")
+    parser.add_argument("--iterations", type=int, default=3, help="report + chat round trips per mode")
+    parser.add_argument("--mode", choices=[*MODES, "both"], default="both", help="section execution mode to measure")
+    parser.add_argument("--topic", default="GLP-1")
+    parser.add_argument("--message", default="What are the main clinical uses of GLP-1 receptor agonists?")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="seconds before the fake model's first token")
+    parser.add_argument("--tokens-per-second", type=float, default=40.0, help="fake model streaming rate")
+    parser.add_argument("--answer-words", type=int, default=80, help="length of the fake model's answers")
+    parser.add_argument("--upstream-latency", type=float, default=0.05, help="seconds the stub server waits per request")
+    parser.add_argument("--timeout", type=float, default=300.0, help="seconds allowed per app run")
+    parser.add_argument("--fixtures", help="directory of recorded upstream responses (default: benchmark_fixtures/)")
+    parser.add_argument(
+        "--memory", action="store_true",
+        help="measure peak Python memory in an extra traced pass, kept out of the latencies"
+    )
+    parser.add_argument("--json", dest="json_path", help="also write the summary to this file")
+    args = parser.parse_args()
+
+    summary = run_benchmark(
+        iterations=args.iterations,
+        modes=list(MODES) if args.mode == "both" else [args.mode],
+        topic=args.topic,
+        message=args.message,
+        llm_latency=args.llm_latency,
+        tokens_per_second=args.tokens_per_second,
+        answer_words=args.answer_words,
+        upstream_latency=args.upstream_latency,
+        timeout=args.timeout,
+        fixtures=args.fixtures or FIXTURES_DIR,
+        memory=args.memory,
+    )
+    print_summary(summary)
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"settings": vars(args), "scenarios": summary}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
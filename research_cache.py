@@ -0,0 +1,244 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from array import array
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+
+def normalize_key(namespace: str, query: str) -> str:
+    namespace = " ".join(namespace.lower().split())
+    query = " ".join(str(query).lower().split())
+    return hashlib.sha256(f"{namespace}\x00{query}".encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    SQLite-backed response cache shared by the research tools.
+
+    Entries are keyed on the normalized tool name and query, expire after a
+    per-tool TTL and are evicted least-recently-used once the stored payloads
+    exceed ``max_bytes``, down to ``EVICT_TO`` of it so the next few writes
+    don't evict again.
+    """
+
+    EVICT_TO = 0.9
+
+    def __init__(
+        self,
+        path: str = "CACHE.db",
+        ttls: Optional[Dict[str, float]] = None,
+        default_ttl: float = 24 * 60 * 60,
+        max_bytes: int = 256 * 1024 * 1024,
+    ):
+        self.path = path
+        self.ttls = {" ".join(k.lower().split()): v for k, v in (ttls or {}).items()}
+        self.default_ttl = default_ttl
+        self.max_bytes = max_bytes
+        self.hits: Dict[str, int] = defaultdict(int)
+        self.misses: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    namespace TEXT,
+                    value TEXT,
+                    size INTEGER,
+                    expires_at REAL,
+                    accessed_at REAL
+                )
+            """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)"
+            )
+            # Running total of payload sizes, so writes don't scan the table
+            self._size = self._stored_size()
+
+    def _stored_size(self) -> int:
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def ttl_for(self, namespace: str) -> float:
+        return self.ttls.get(" ".join(namespace.lower().split()), self.default_ttl)
+
+    def get(self, namespace: str, query: str) -> Any:
+        """Return the cached value, or ``None`` on a miss or expired entry."""
+        key = normalize_key(namespace, query)
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value, expires_at, size FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] < now:
+                if row is not None:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._size -= row[2]
+                self.misses[namespace] += 1
+                return None
+            self._conn.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+        self.hits[namespace] += 1
+        return json.loads(row[0])
+
+    def set(self, namespace: str, query: str, value: Any) -> None:
+        payload = json.dumps(value)
+        key = normalize_key(namespace, query)
+        now = time.time()
+        with self._lock, self._conn:
+            replaced = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO responses (key, namespace, value, size, expires_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    key,
+                    namespace,
+                    payload,
+                    len(payload),
+                    now + self.ttl_for(namespace),
+                    now,
+                ),
+            )
+            self._size += len(payload) - (replaced[0] if replaced else 0)
+            self._evict()
+
+    def _evict(self) -> None:
+        if self._size <= self.max_bytes:
+            return
+        self._conn.execute("DELETE FROM responses WHERE expires_at < ?", (time.time(),))
+        # Resync once per eviction, as other processes may write to the same file
+        self._size = self._stored_size()
+        target = self.max_bytes * self.EVICT_TO
+        stale = []
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at ASC"
+        ):
+            if self._size <= target:
+                break
+            stale.append((key,))
+            self._size -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+
+    def get_or_set(
+        self,
+        namespace: str,
+        query: str,
+        fetch: Callable[[], Any],
+        should_cache: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """
+        Return the cached value, fetching and storing it on a miss.
+
+        A fetched value for which ``should_cache`` returns false, such as a
+        tool's error message, is returned but not stored.
+        """
+        value = self.get(namespace, query)
+        if value is None:
+            value = fetch()
+            if should_cache is None or should_cache(value):
+                self.set(namespace, query, value)
+        return value
+
+    def cached(
+        self,
+        namespace: str,
+        func: Callable[[str], Any],
+        should_cache: Optional[Callable[[Any], bool]] = None,
+    ) -> Callable[[str], Any]:
+        """Wrap a single-query tool function so repeated queries skip the upstream call."""
+        def wrapper(query: str) -> Any:
+            return self.get_or_set(namespace, query, lambda: func(query), should_cache)
+        return wrapper
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        namespaces = set(self.hits) | set(self.misses)
+        return {ns: {"hits": self.hits[ns], "misses": self.misses[ns]} for ns in sorted(namespaces)}
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that stores vectors in SQLite keyed by model and text hash.
+
+    Vectors are kept as float32 blobs. Cache misses from one call are sent
+    upstream as a single batch.
+    """
+
+    # Keeps IN (...) lookups under SQLite's bound-parameter limit
+    LOOKUP_BATCH = 500
+
+    def __init__(self, underlying: Embeddings, path: str = "CACHE.db", model: Optional[str] = None):
+        self.underlying = underlying
+        self.model = model or getattr(underlying, "model", None) or type(underlying).__name__
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    model TEXT,
+                    key TEXT,
+                    vector BLOB,
+                    PRIMARY KEY (model, key)
+                )
+            """)
+
+    def _lookup(self, model: str, keys: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            for i in range(0, len(unique), self.LOOKUP_BATCH):
+                batch = unique[i:i + self.LOOKUP_BATCH]
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE model = ? AND key IN ({','.join('?' * len(batch))})",
+                    [model, *batch]
+                )
+                for key, blob in rows:
+                    found[key] = array("f", blob).tolist()
+        return found
+
+    def _store(self, model: str, vectors: Dict[str, List[float]]) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, key, vector) VALUES (?, ?, ?)",
+                [(model, key, array("f", vector).tobytes()) for key, vector in vectors.items()]
+            )
+
+    def _embed(self, kind: str, texts: List[str], fetch: Callable[[List[str]], List[List[float]]]) -> List[List[float]]:
+        model = f"{self.model}:{kind}"
+        keys = [hashlib.sha256(text.encode("utf-8")).hexdigest() for text in texts]
+        found = self._lookup(model, keys)
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                missing.setdefault(key, text)
+        if missing:
+            fetched = dict(zip(missing, fetch(list(missing.values()))))
+            self._store(model, fetched)
+            found.update(fetched)
+        self.misses += len(missing)
+        self.hits += len(texts) - len(missing)
+        return [found[key] for key in keys]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed("document", texts, self.underlying.embed_documents)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed("query", [text], lambda texts: [self.underlying.embed_query(texts[0])])[0]
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
@@ -0,0 +1,414 @@
+"""
+Local stand-ins for the services the app calls, used by research_benchmark.
+
+``FakeChatModel`` answers with deterministic text at a configurable latency
+and token rate, speaking just enough ReAct to drive both agents.
+``FakeEmbeddings`` hashes words into fixed vectors. ``StubServer`` replays the
+responses in ``benchmark_fixtures/`` for UniProt, PubMed, SerpAPI and
+Wikipedia over local HTTP, so the real UniProt, PubMed and Google Scholar
+wrappers still do their own requests and parsing.
+"""
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+import urllib.parse
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, List, Optional
+
+import requests
+from langchain_community.utilities.google_scholar import GoogleScholarAPIWrapper
+from langchain_community.utilities.pubmed import PubMedAPIWrapper
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from research_backends import Backends
+from research_retrieval import tokenize
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "benchmark_fixtures"
+
+# (path prefix, upstream, fixture file); longer prefixes first
+STUB_ROUTES = [
+    ("/uniprot/uniprotkb/search", "uniprot", "uniprot_search.json"),
+    ("/uniprot/uniprotkb/", "uniprot", "uniprot_entry.json"),
+    ("/pubmed/esearch.fcgi", "pubmed", "pubmed_esearch.json"),
+    ("/pubmed/efetch.fcgi", "pubmed", "pubmed_efetch.xml"),
+    ("/serpapi/search", "serpapi", "scholar.json"),
+    ("/wikipedia/search", "wikipedia", "wikipedia.json"),
+]
+
+# Search routes that page their "results" by ``size`` and ``cursor`` like UniProt, with a Link header
+PAGED_ROUTES = ("/uniprot/uniprotkb/search",)
+
+CONTENT_TYPES = {".json": "application/json", ".xml": "text/xml"}
+
+# UniProtKB return fields and the part of an entry each one returns in JSON:
+# a top-level section, or only its comments / cross-references of one type.
+# Literature fields return whole reference objects, citation details included.
+UNIPROT_RETURN_FIELDS = {
+    "accession": ("primaryAccession", None),
+    "id": ("uniProtkbId", None),
+    "protein_name": ("proteinDescription", None),
+    "organism_name": ("organism", None),
+    "cc_function": ("comments", ("commentType", "FUNCTION")),
+    "cc_subcellular_location": ("comments", ("commentType", "SUBCELLULAR LOCATION")),
+    "cc_domain": ("comments", ("commentType", "DOMAIN")),
+    "cc_ptm": ("comments", ("commentType", "PTM")),
+    "sequence": ("sequence", None),
+    "xref_pdb": ("uniProtKBCrossReferences", ("database", "PDB")),
+    "xref_embl": ("uniProtKBCrossReferences", ("database", "EMBL")),
+    "lit_pubmed_id": ("references", None),
+}
+
+# Words the fake chat model writes its answers from
+VOCABULARY = (
+    "glucagon-like peptide receptor agonist insulin secretion glucose homeostasis pancreatic beta cells "
+    "incretin hormone clinical trial HbA1c reduction body weight cardiovascular outcomes signalling "
+    "cyclic AMP half-life structure binding affinity semaglutide liraglutide exenatide study cohort "
+    "patients dose response mechanism expression regulation pathway"
+).split()
+
+TOOL_LIST = re.compile(r"should be one of \[(.*?)\]")
+TOKEN = re.compile(r"\S+\s*")
+# Path segments allowed to pick a specific fixture file, e.g. a UniProt accession
+SEGMENT = re.compile(r"[A-Za-z0-9_-]+")
+
+# Keywords in a question and the tool name fragment the fake agent reaches for
+TOOL_KEYWORDS = [
+    ("uniprot", "UniProt"),
+    ("scholar", "Scholar"),
+    ("hyperlink", "Scholar"),
+    ("papers", "Pubmed"),
+    ("previous", "Previous"),
+]
+
+
+class CallCounter:
+    """Thread-safe call counts per upstream."""
+
+    def __init__(self):
+        self.counts = Counter()
+        self._lock = threading.Lock()
+
+    def add(self, upstream, count=1):
+        with self._lock:
+            self.counts[upstream] += count
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.counts)
+
+
+def filler(seed, words):
+    rng = random.Random(hashlib.sha256(seed.encode("utf-8")).digest())
+    return " ".join(rng.choice(VOCABULARY) for _ in range(words)) + "."
+
+
+def project_entry(entry, fields):
+    """Reduce a full UniProtKB entry to what a search with ``fields=`` returns; unknown fields raise ``KeyError``."""
+    selectors = {}
+    for field in fields:
+        key, selector = UNIPROT_RETURN_FIELDS[field]
+        selectors.setdefault(key, set()).add(selector)
+    projected = {}
+    for key, value in entry.items():
+        if key not in selectors:
+            continue
+        if None in selectors[key]:
+            projected[key] = value
+        else:
+            projected[key] = [item for item in value if any(item.get(attr) == kind for attr, kind in selectors[key])]
+    return projected
+
+
+def pick_tool(tool_names, question):
+    question = question.lower()
+    for keyword, fragment in TOOL_KEYWORDS:
+        if keyword in question:
+            for name in tool_names:
+                if fragment in name:
+                    return name
+    return next((name for name in tool_names if "Wikipedia" in name), tool_names[0])
+
+
+def fake_reply(prompt, words):
+    """
+    Reply to ``prompt`` the way the app needs.
+
+    Agent prompts get one tool call, then a final answer once an observation
+    is in the scratchpad; anything else (planned sections, QA, summaries)
+    gets ``words`` words of deterministic text.
+    """
+    match = TOOL_LIST.search(prompt)
+    if match is None:
+        return filler(prompt, words)
+    tool_names = [name.strip() for name in match.group(1).split(",")]
+    conversational = "Do I need to use a tool?" in prompt
+    question = prompt.rsplit("New input:" if conversational else "Question:", 1)[-1]
+    query = next((line.strip() for line in question.splitlines() if line.strip()), "")[:100]
+    answered = "Observation:" in question
+    if conversational:
+        if answered:
+            return f"Do I need to use a tool? No\nAI: {filler(prompt, words)}"
+        return f"Do I need to use a tool? Yes\nAction: {pick_tool(tool_names, question)}\nAction Input: {query}"
+    if answered:
+        return f" I now know the final answer\nFinal Answer: {filler(prompt, words)}"
+    return f" I should look this up.\nAction: {pick_tool(tool_names, question)}\nAction Input: {query}"
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model that streams deterministic replies after ``latency`` seconds at ``tokens_per_second``."""
+
+    latency: float = 0.5
+    tokens_per_second: float = 40.0
+    answer_words: int = 80
+    counter: Any = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def get_num_tokens(self, text: str) -> int:
+        # The default counts with a GPT-2 tokenizer downloaded from the Hub
+        return len(TOKEN.findall(text))
+
+    def _generate(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        if self.counter is not None:
+            self.counter.add("openai.chat")
+        prompt = "\n".join(str(message.content) for message in messages)
+        text = fake_reply(prompt, self.answer_words)
+        for token in stop or []:
+            text = text.split(token)[0]
+
+        tokens = TOKEN.findall(text)
+        started = time.perf_counter()
+        for i, token in enumerate(tokens):
+            # Schedule against the start so sleep overshoot doesn't accumulate
+            delay = started + self.latency + i / self.tokens_per_second - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            if run_manager is not None:
+                run_manager.on_llm_new_token(token)
+        return ChatResult(
+            generations=[ChatGeneration(message=AIMessage(content=text))],
+            llm_output={"token_usage": {
+                "prompt_tokens": self.get_num_tokens(prompt),
+                "completion_tokens": len(tokens),
+            }},
+        )
+
+
+class FakeEmbeddings(Embeddings):
+    """Deterministic feature-hashing embeddings; one counted call per request."""
+
+    model = "fake-hashing"
+
+    def __init__(self, size=256, counter=None):
+        self.size = size
+        self.counter = counter
+
+    def _embed(self, text):
+        vector = [0.0] * self.size
+        for term in tokenize(text):
+            digest = hashlib.sha1(term.encode("utf-8")).digest()
+            index = int.from_bytes(digest[:4], "little") % self.size
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+        return [value / norm for value in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.counter is not None:
+            self.counter.add("openai.embeddings")
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+class StubServer:
+    """
+    Local HTTP server replaying fixtures, counting requests per upstream.
+
+    A path segment after a route's prefix selects a more specific fixture
+    when one exists, e.g. ``uniprot_entry_P01275.json`` for that accession.
+    UniProt searches are paged by ``size`` and ``cursor`` with a ``Link``
+    header to the next page, and a ``fields=`` search returns entries cut
+    down to those fields as UniProt does (an unknown field is a 400). Each
+    response is delayed by ``latency`` seconds to stand in for the network,
+    and ``requests`` lists every path requested.
+    """
+
+    def __init__(self, fixtures=FIXTURES_DIR, counter=None, latency=0.0, host="127.0.0.1", port=0):
+        self.fixtures = Path(fixtures)
+        self.counter = counter if counter is not None else CallCounter()
+        self.latency = latency
+        self.requests = []
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def resolve(self, path):
+        """Return ``(upstream, fixture path)`` for a request path, or ``None``."""
+        for prefix, upstream, name in STUB_ROUTES:
+            if path.startswith(prefix):
+                fixture = self.fixtures / name
+                segment = urllib.parse.unquote(path[len(prefix):].strip("/"))
+                if SEGMENT.fullmatch(segment):
+                    specific = fixture.with_name(f"{fixture.stem}_{segment}{fixture.suffix}")
+                    if specific.exists():
+                        fixture = specific
+                return upstream, fixture
+        return None
+
+    def page(self, path, params, body):
+        """Slice a search fixture to the requested page, returning the body and the next page's URL."""
+        if not path.startswith(PAGED_ROUTES) or ("size" not in params and "fields" not in params):
+            return body, None
+        data = json.loads(body)
+        results = data.get("results", [])
+        size = int(params.get("size", [len(results)])[0])
+        cursor = int(params.get("cursor", ["0"])[0])
+        page = results[cursor:cursor + size]
+        if "fields" in params:
+            page = [project_entry(entry, params["fields"][0].split(",")) for entry in page]
+        body = json.dumps({**data, "results": page}).encode("utf-8")
+        if cursor + size >= len(results):
+            return body, None
+        query = urllib.parse.urlencode({**params, "cursor": [str(cursor + size)]}, doseq=True)
+        return body, f"{self.url}{path}?{query}"
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.requests.append(self.path)
+                url = urllib.parse.urlsplit(self.path)
+                route = stub.resolve(url.path)
+                if route is None:
+                    self.send_error(404)
+                    return
+                upstream, fixture = route
+                stub.counter.add(upstream)
+                if stub.latency:
+                    time.sleep(stub.latency)
+                try:
+                    body, next_url = stub.page(url.path, urllib.parse.parse_qs(url.query), fixture.read_bytes())
+                except KeyError as ex:
+                    self.send_error(400, f"Invalid fields parameter value {ex}")
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPES.get(fixture.suffix, "application/octet-stream"))
+                self.send_header("Content-Length", str(len(body)))
+                if next_url:
+                    self.send_header("Link", f'<{next_url}>; rel="next"')
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class StubScholarSearch:
+    """Stand-in for serpapi's ``GoogleScholarSearch`` that queries ``base_url`` instead of serpapi.com."""
+
+    base_url = None
+
+    def __init__(self, params):
+        self.params = params
+
+    def get_dict(self):
+        response = requests.get(
+            f"{self.base_url}/serpapi/search", params={"engine": "google_scholar", **self.params}, timeout=30
+        )
+        response.raise_for_status()
+        return response.json()
+
+
+class StubWikipedia:
+    """Stand-in for ``WikipediaAPIWrapper``, formatting stub pages the same way."""
+
+    def __init__(self, base_url, top_k_results=3, doc_content_chars_max=4000):
+        self.base_url = base_url
+        self.top_k_results = top_k_results
+        self.doc_content_chars_max = doc_content_chars_max
+
+    def run(self, query):
+        response = requests.get(f"{self.base_url}/wikipedia/search", params={"q": query[:300]}, timeout=30)
+        response.raise_for_status()
+        pages = response.json().get("pages", [])[:self.top_k_results]
+        if not pages:
+            return "No good Wikipedia Search Result was found"
+        summaries = [f"Page: {page['title']}\nSummary: {page['summary']}" for page in pages]
+        return "\n\n".join(summaries)[:self.doc_content_chars_max]
+
+
+class OfflineBackends(Backends):
+    """Backends that use the fakes above and a running ``StubServer``."""
+
+    def __init__(self, base_url, counter, latency=0.5, tokens_per_second=40.0, answer_words=80):
+        self.base_url = base_url
+        self.counter = counter
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.answer_words = answer_words
+
+    def chat_model(self, api_key, model, temperature):
+        return FakeChatModel(
+            latency=self.latency,
+            tokens_per_second=self.tokens_per_second,
+            answer_words=self.answer_words,
+            counter=self.counter,
+        )
+
+    def embeddings(self):
+        return FakeEmbeddings(counter=self.counter)
+
+    def tool_options(self):
+        scholar = GoogleScholarAPIWrapper(serp_api_key="offline")
+        # The engine is set by a validator rather than declared, so pydantic rejects plain assignment
+        engine = type("StubScholarSearch", (StubScholarSearch,), {"base_url": self.base_url})
+        object.__setattr__(scholar, "google_scholar_engine", engine)
+        return {
+            "wrappers": {
+                "wikipedia": StubWikipedia(self.base_url),
+                "pubmed": PubMedAPIWrapper(
+                    base_url_esearch=f"{self.base_url}/pubmed/esearch.fcgi?",
+                    base_url_efetch=f"{self.base_url}/pubmed/efetch.fcgi?",
+                ),
+                "google_scholar": scholar,
+            },
+            "uniprot_options": {
+                "base_url_search": f"{self.base_url}/uniprot/uniprotkb/search?",
+                "base_url_entry": f"{self.base_url}/uniprot/uniprotkb/",
+            },
+        }
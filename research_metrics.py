@@ -0,0 +1,260 @@
+import json
+import threading
+import time
+from collections import defaultdict
+from functools import lru_cache
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from research_agents import MODEL_PRICES
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+
+@lru_cache(maxsize=None)
+def token_encoding(model):
+    """The model's tiktoken encoding, or ``None`` if unknown or it can't be downloaded (e.g. offline)."""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except Exception:
+        return None
+
+
+def count_tokens(text, model):
+    """Count tokens with tiktoken when available, else estimate at ~4 characters per token."""
+    encoding = token_encoding(model)
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return len(text) // 4
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens):
+    prompt_price, completion_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1000
+
+
+def label_value(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class HttpMetrics:
+    """Process-wide request counts and latencies per upstream host and status."""
+
+    def __init__(self):
+        self.counts = defaultdict(int)
+        self.seconds = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def record(self, upstream, status, seconds):
+        with self._lock:
+            self.counts[(upstream, status)] += 1
+            self.seconds[(upstream, status)] += seconds
+
+    def snapshot(self):
+        with self._lock:
+            return [
+                {"upstream": upstream, "status": status, "count": count, "seconds": self.seconds[(upstream, status)]}
+                for (upstream, status), count in sorted(self.counts.items())
+            ]
+
+
+http_metrics = HttpMetrics()
+
+
+class MetricsHandler(BaseCallbackHandler):
+    """Record wall time, agent iterations, tool latencies and token usage for one section."""
+
+    def __init__(self, stats, model, lock):
+        self.stats = stats
+        self.model = model
+        self._lock = lock
+        self._chains = {}
+        self._tools = {}
+        self._streamed = defaultdict(int)
+        self._prompt_tokens = {}
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs):
+        if parent_run_id is None:
+            self._chains[run_id] = time.perf_counter()
+
+    def on_chain_end(self, outputs, *, run_id, parent_run_id=None, **kwargs):
+        if parent_run_id is None and run_id in self._chains:
+            with self._lock:
+                self.stats["wall_time"] += time.perf_counter() - self._chains.pop(run_id)
+
+    def on_chain_error(self, error, *, run_id, parent_run_id=None, **kwargs):
+        self.on_chain_end({}, run_id=run_id, parent_run_id=parent_run_id)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._prompt_tokens[run_id] = sum(count_tokens(prompt, self.model) for prompt in prompts)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._prompt_tokens[run_id] = sum(
+            count_tokens(str(message.content), self.model) for batch in messages for message in batch
+        )
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        self._streamed[run_id] += 1
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        # Streaming responses carry no token_usage, so fall back to what was counted here
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        prompt_tokens = usage.get("prompt_tokens", self._prompt_tokens.pop(run_id, 0))
+        completion_tokens = usage.get("completion_tokens", self._streamed.pop(run_id, 0))
+        with self._lock:
+            self.stats["llm_calls"] += 1
+            self.stats["prompt_tokens"] += prompt_tokens
+            self.stats["completion_tokens"] += completion_tokens
+            self.stats["cost"] += estimate_cost(self.model, prompt_tokens, completion_tokens)
+
+    def on_agent_action(self, action, **kwargs):
+        with self._lock:
+            self.stats["iterations"] += 1
+
+    def on_agent_finish(self, finish, **kwargs):
+        with self._lock:
+            self.stats["iterations"] += 1
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        self._tools[run_id] = (serialized.get("name", "tool"), time.perf_counter())
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._finish_tool(run_id, error=False)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._finish_tool(run_id, error=True)
+
+    def _finish_tool(self, run_id, error):
+        if run_id not in self._tools:
+            return
+        name, started = self._tools.pop(run_id)
+        with self._lock:
+            self.stats["tool_calls"].append({
+                "tool": name,
+                "seconds": time.perf_counter() - started,
+                "error": error,
+            })
+
+
+class ReportMetrics:
+    """Per-section metrics for one report or chat reply, exportable as JSON lines or OpenMetrics."""
+
+    def __init__(self, model):
+        self.model = model
+        self.sections = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild metrics saved with ``to_dict``, e.g. from a Research row."""
+        metrics = cls(data.get("model", ""))
+        metrics.sections = data.get("sections", {})
+        return metrics
+
+    def handler(self, section):
+        return MetricsHandler(self._stats(section), self.model, self._lock)
+
+    def record_time(self, section, seconds):
+        """Add wall time for a stage that runs outside any agent, such as embedding."""
+        stats = self._stats(section)
+        with self._lock:
+            stats["wall_time"] += seconds
+
+    def _stats(self, section):
+        with self._lock:
+            return self.sections.setdefault(section, {
+                "wall_time": 0.0,
+                "iterations": 0,
+                "llm_calls": 0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "cost": 0.0,
+                "tool_calls": [],
+            })
+
+    def to_dict(self):
+        with self._lock:
+            return {"model": self.model, "sections": json.loads(json.dumps(self.sections))}
+
+    def rows(self):
+        """One summary row per section, for tables."""
+        return [
+            {
+                "section": name,
+                "seconds": round(stats["wall_time"], 2),
+                "iterations": stats["iterations"],
+                "llm calls": stats["llm_calls"],
+                "tool calls": len(stats["tool_calls"]),
+                "tool seconds": round(sum(call["seconds"] for call in stats["tool_calls"]), 2),
+                "prompt tokens": stats["prompt_tokens"],
+                "completion tokens": stats["completion_tokens"],
+                "cost ($)": round(stats["cost"], 4),
+            }
+            for name, stats in self.to_dict()["sections"].items()
+        ]
+
+    def to_json_lines(self):
+        lines = []
+        for name, stats in self.to_dict()["sections"].items():
+            summary = {key: value for key, value in stats.items() if key != "tool_calls"}
+            lines.append(json.dumps({"type": "section", "model": self.model, "section": name, **summary}))
+            for call in stats["tool_calls"]:
+                lines.append(json.dumps({"type": "tool_call", "section": name, **call}))
+        for request in http_metrics.snapshot():
+            lines.append(json.dumps({"type": "http", **request}))
+        return "\n".join(lines) + "\n"
+
+    def to_openmetrics(self):
+        sections = self.to_dict()["sections"]
+        lines = []
+
+        def family(name, kind, help_text, samples):
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"# HELP {name} {help_text}")
+            for suffix, labels, value in samples:
+                label_text = ",".join(f'{key}="{label_value(val)}"' for key, val in labels.items())
+                lines.append(f"{name}{suffix}{{{label_text}}} {value}")
+
+        family("research_section_seconds", "gauge", "Wall time per report section.", [
+            ("", {"section": name}, stats["wall_time"]) for name, stats in sections.items()
+        ])
+        family("research_section_iterations", "gauge", "Agent loop iterations per section.", [
+            ("", {"section": name}, stats["iterations"]) for name, stats in sections.items()
+        ])
+        family("research_section_llm_calls", "gauge", "LLM requests per section.", [
+            ("", {"section": name}, stats["llm_calls"]) for name, stats in sections.items()
+        ])
+        family("research_tokens", "gauge", "LLM tokens per section.", [
+            ("", {"section": name, "kind": kind}, stats[f"{kind}_tokens"])
+            for name, stats in sections.items()
+            for kind in ("prompt", "completion")
+        ])
+        family("research_cost_usd", "gauge", "Estimated LLM cost per section.", [
+            ("", {"section": name, "model": self.model}, stats["cost"]) for name, stats in sections.items()
+        ])
+        tools = defaultdict(lambda: [0, 0.0])
+        for stats in sections.values():
+            for call in stats["tool_calls"]:
+                tools[call["tool"]][0] += 1
+                tools[call["tool"]][1] += call["seconds"]
+        family("research_tool_call_seconds", "summary", "Tool call latency.", [
+            sample
+            for tool, (count, seconds) in tools.items()
+            for sample in (("_count", {"tool": tool}, count), ("_sum", {"tool": tool}, seconds))
+        ])
+        requests = http_metrics.snapshot()
+        family("research_http_request_seconds", "summary", "Upstream HTTP request latency since process start.", [
+            sample
+            for request in requests
+            for sample in (
+                ("_count", {"upstream": request["upstream"], "status": request["status"]}, request["count"]),
+                ("_sum", {"upstream": request["upstream"], "status": request["status"]}, request["seconds"]),
+            )
+        ])
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,203 @@
+import hashlib
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+
+class Section:
+    def __init__(self, name, title, run, deps=(), spinner=None):
+        self.name = name
+        self.title = title
+        self.run = run
+        self.deps = tuple(deps)
+        self.spinner = spinner or f"Generating {title.rstrip(':')}"
+
+
+def research_sections(user_input, run_agent, previous_research=None, run_planned=None):
+    """
+    Declare the report sections, their data sources and the sections each one depends on.
+
+    ``run_agent`` takes a prompt and a list of callback handlers and returns
+    the agent's output text; ``previous_research`` does the same for the
+    previous-research QA chain and the section is left out when it is ``None``.
+    With ``run_planned`` (see ``research_agents.build_planned_runner``) each
+    section calls its declared ``(tool name, query)`` sources directly instead
+    of letting the agent pick tools.
+    """
+    def ask(prompt, sources, callbacks):
+        if run_planned is not None:
+            return run_planned(prompt, sources, callbacks)
+        return run_agent(prompt, callbacks)
+
+    wikipedia = ("Wikipedia Research Tool", user_input)
+    pubmed = ("Pubmed Science and Medical Journal Research Tool", user_input)
+    scholar = ("Google Scholar Search Tool", user_input)
+    uniprot = ("UniProt Protein Information Tool", user_input)
+
+    sections = [
+        Section(
+            "intro", "Introduction:",
+            lambda r, cb: ask(f'Write an academic introduction about {user_input} with at least three paragraphs.', [wikipedia, pubmed], cb),
+        ),
+        Section(
+            "uniprot_info", "Protein Information from UniProt:",
+            lambda r, cb: ask(f'''
+                Provide detailed information about the protein: "{user_input}" from UniProt including function, organism amino acid sequences, and PDB structures.
+            ''', [uniprot], cb),
+            spinner="Generating Protein Information",
+        ),
+        Section(
+            "quant_facts", "Quantitative Facts:",
+            lambda r, cb: ask(f'''
+                Considering user input: {user_input} and the intro paragraph: {r['intro']}
+                \nGenerate a list of 3 to 5 quantitative facts about: {user_input}
+                \nOnly return the list of quantitative facts
+            ''', [wikipedia], cb),
+            deps=["intro"],
+            spinner="Generating Statistical Facts",
+        ),
+    ]
+    if previous_research is not None:
+        sections.append(Section(
+            "prev_research", "Previous Related Research:",
+            lambda r, cb: previous_research(f'''
+                    \nReferring to previous results and information, write about: {user_input}
+                ''', cb),
+            spinner="Researching Previous Research",
+        ))
+    sections += [
+        Section(
+            "papers", "Recent Publications:",
+            lambda r, cb: ask(f'''
+                Consider user input: "{user_input}".
+                \nConsider the intro paragraph: "{r['intro']}",
+                \nConsider these quantitative facts "{r['quant_facts']}"
+                \nNow Generate a list of 4 to 5 recent academic papers relating to {user_input}.
+                \nInclude Titles, Links to the article, Abstracts.
+            ''', [pubmed, scholar], cb),
+            deps=["intro", "quant_facts"],
+        ),
+        Section(
+            "books", "Recommended Books:",
+            # No tool covers books, so planned mode answers from the context alone
+            lambda r, cb: ask(f'''
+                Consider user input: "{user_input}".
+                \nConsider the intro paragraph: "{r['intro']}",
+                \nConsider these quantitative facts "{r['quant_facts']}"
+                \nNow Generate a list of 5 relevant books to read relating to {user_input}.
+            ''', [], cb),
+            deps=["intro", "quant_facts"],
+        ),
+        Section(
+            "scholar_links", "Research Article Hyperlinks:",
+            lambda r, cb: ask(f'''
+                Find research articles related to: "{user_input}" on Google Scholar.
+                \nProvide titles and working hyperlinks to the articles.
+            ''', [scholar], cb),
+        ),
+    ]
+    return sections
+
+
+def run_sections(sections, max_workers=4, on_complete=None, callbacks_for=None, on_tick=None, tick_interval=0.2, completed=None):
+    """
+    Run sections concurrently as soon as their dependencies have finished.
+
+    ``on_complete(section, output)`` is called from the calling thread as
+    each section finishes, and ``on_tick()`` every ``tick_interval`` seconds
+    while sections are running, so both are safe places to write to
+    Streamlit. ``callbacks_for(section)`` supplies the callback handlers
+    passed to each section's run. ``completed`` holds outputs of sections
+    finished earlier (e.g. restored from a checkpoint), which are not run
+    again. Returns a dict of outputs keyed by section name.
+    """
+    by_name = {section.name: section for section in sections}
+    for section in sections:
+        missing = [dep for dep in section.deps if dep not in by_name]
+        if missing:
+            raise ValueError(f"Section {section.name!r} depends on unknown sections {missing}")
+
+    results = {name: output for name, output in (completed or {}).items() if name in by_name}
+    pending = [section for section in sections if section.name not in results]
+    running = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while pending or running:
+            for section in [s for s in pending if all(dep in results for dep in s.deps)]:
+                pending.remove(section)
+                callbacks = callbacks_for(section) if callbacks_for else []
+                running[executor.submit(section.run, dict(results), callbacks)] = section
+            if not running:
+                raise ValueError(f"Circular section dependencies: {[s.name for s in pending]}")
+            done, _ = wait(
+                running,
+                timeout=tick_interval if on_tick else None,
+                return_when=FIRST_COMPLETED
+            )
+            for future in done:
+                section = running.pop(future)
+                try:
+                    results[section.name] = future.result()
+                except BaseException:
+                    for other in running:
+                        other.cancel()
+                    raise
+                if on_complete:
+                    on_complete(section, results[section.name])
+            if on_tick:
+                on_tick()
+    return results
+
+
+def chunk_id(text, research_id):
+    """
+    Hash of a chunk's report and text, used as its ID in the vector store and the BM25 index.
+
+    The same text in two reports gets two IDs, so each copy keeps its own
+    ``research_id`` and ``topic`` metadata and a ``research_id`` filter
+    finds it in both; ``CachedEmbeddings`` still embeds the text only once.
+    """
+    return hashlib.sha256(f"{research_id}\x00{text}".encode("utf-8")).hexdigest()
+
+
+def chunk_research(research_id, topic, sections, chunk_size=1000, chunk_overlap=150):
+    """
+    Split each report section into overlapping chunks tagged with where they came from.
+
+    ``sections`` maps a section name (the ``Research`` column) to its text;
+    empty sections are skipped.
+    """
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    names = [name for name, text in sections.items() if text]
+    return splitter.create_documents(
+        [sections[name] for name in names],
+        metadatas=[{"research_id": research_id, "section": name, "topic": topic} for name in names]
+    )
+
+
+def ingest_research(vectordb, research_id, topic, sections, **chunk_kwargs):
+    """Add one report's chunks to an existing vector store in place; see ``ingest_reports``."""
+    return ingest_reports(vectordb, [(research_id, topic, sections)], **chunk_kwargs)
+
+
+def ingest_reports(vectordb, reports, **chunk_kwargs):
+    """
+    Add the chunks of several ``(research_id, topic, sections)`` reports to a vector store.
+
+    Chunk IDs hash each chunk's report and text (see ``chunk_id``), so
+    chunks already in the collection are neither re-embedded nor duplicated. New chunks go out in a single
+    ``add_texts`` call so the embedder can batch them. Returns the number
+    of chunks added.
+    """
+    chunks = {}
+    for research_id, topic, sections in reports:
+        for doc in chunk_research(research_id, topic, sections, **chunk_kwargs):
+            chunks.setdefault(chunk_id(doc.page_content, research_id), doc)
+    existing = set(vectordb.get(ids=list(chunks))["ids"]) if chunks else set()
+    new_ids = [chunk_id for chunk_id in chunks if chunk_id not in existing]
+    if new_ids:
+        vectordb.add_texts(
+            [chunks[chunk_id].page_content for chunk_id in new_ids],
+            metadatas=[chunks[chunk_id].metadata for chunk_id in new_ids],
+            ids=new_ids
+        )
+    return len(new_ids)
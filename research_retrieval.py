@@ -0,0 +1,210 @@
+import heapq
+import math
+import re
+import sqlite3
+import threading
+from collections import Counter, defaultdict
+from contextlib import closing
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from research_pipeline import chunk_id, chunk_research
+
+# Research columns indexed as separate sections, matching the chunk metadata
+SECTION_COLUMNS = ["user_input", "introduction", "quant_facts", "publications", "books", "prev_research"]
+
+# Keeps hyphenated names and accession IDs such as GLP-1 or P01275 as single tokens
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-_.][a-z0-9]+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def matches_filter(metadata: Dict, filter: Optional[Dict]) -> bool:
+    return not filter or all(metadata.get(key) == value for key, value in filter.items())
+
+
+class BM25Index:
+    """
+    In-memory inverted index with BM25 scoring over report chunks.
+
+    Reports are split with ``chunk_research`` and keyed by ``chunk_id``, so
+    hits line up with the vector store's chunks. Only postings and metadata
+    are held; chunk texts are kept only with ``keep_text=True`` and are
+    otherwise looked up in the vector store by ID. An index built with
+    ``from_research_db`` can also rebuild chunks from their Research rows.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, keep_text: bool = False):
+        self.k1 = k1
+        self.b = b
+        self.keep_text = keep_text
+        self.postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self.ids: List[str] = []
+        self.metadatas: List[Dict] = []
+        self.texts: Dict[str, str] = {}
+        self.lengths: List[int] = []
+        self.positions: Dict[str, int] = {}
+        self.total_length = 0
+        self.path: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_research_db(cls, path: str = "MASTER.db", **kwargs) -> "BM25Index":
+        index = cls(**kwargs)
+        index.path = path
+        with sqlite3.connect(path) as conn:
+            rows = conn.execute(f"SELECT research_id, {', '.join(SECTION_COLUMNS)} FROM Research")
+            for row in rows:
+                index.add_research(row[0], dict(zip(SECTION_COLUMNS, row[1:])))
+        return index
+
+    def add_research(self, research_id: int, sections: Dict[str, str]) -> None:
+        """Index one report's chunks, split exactly as ``ingest_research`` splits them."""
+        for doc in chunk_research(research_id, sections.get("user_input", ""), sections):
+            self.add(doc.page_content, doc.metadata)
+
+    def add(self, text: str, metadata: Dict) -> None:
+        key = chunk_id(text, metadata.get("research_id"))
+        terms = Counter(tokenize(text))
+        with self._lock:
+            if key in self.positions:
+                return
+            idx = len(self.ids)
+            self.positions[key] = idx
+            self.ids.append(key)
+            self.metadatas.append(metadata)
+            if self.keep_text:
+                self.texts[key] = text
+            length = sum(terms.values())
+            self.lengths.append(length)
+            self.total_length += length
+            for term, tf in terms.items():
+                self.postings[term][idx] = tf
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(self, query: str, k: int = 10, filter: Optional[Dict] = None) -> List[Tuple[str, float]]:
+        """Return the ``k`` best ``(chunk ID, score)`` pairs."""
+        with self._lock:
+            n_docs = len(self.ids)
+            if not n_docs:
+                return []
+            avg_length = self.total_length / n_docs
+            scores: Dict[int, float] = defaultdict(float)
+            for term in set(tokenize(query)):
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for idx, tf in postings.items():
+                    if not matches_filter(self.metadatas[idx], filter):
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * self.lengths[idx] / avg_length)
+                    scores[idx] += idf * tf * (self.k1 + 1) / (tf + norm)
+            top = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+            return [(self.ids[idx], score) for idx, score in top]
+
+    def documents(self, ids: List[str]) -> Dict[str, Document]:
+        """Return the kept chunks among ``ids``; empty unless built with ``keep_text``."""
+        with self._lock:
+            return {
+                key: Document(page_content=self.texts[key], metadata=self.metadatas[self.positions[key]])
+                for key in ids
+                if key in self.texts
+            }
+
+    def read_back(self, ids: List[str]) -> Dict[str, Document]:
+        """
+        Rebuild the chunks among ``ids`` from the Research rows they were indexed from.
+
+        Reports ingested before chunk IDs were content hashes sit in the
+        vector store under random IDs, so their BM25-only hits can't be
+        fetched from it by ID.
+        """
+        with self._lock:
+            wanted = {key: self.metadatas[self.positions[key]]["research_id"] for key in ids if key in self.positions}
+        if self.path is None or not wanted:
+            return {}
+        research_ids = sorted(set(wanted.values()))
+        found = {}
+        with closing(sqlite3.connect(self.path)) as conn:
+            rows = conn.execute(
+                f"SELECT research_id, {', '.join(SECTION_COLUMNS)} FROM Research "
+                f"WHERE research_id IN ({', '.join('?' * len(research_ids))})",
+                research_ids,
+            )
+            for row in rows:
+                sections = dict(zip(SECTION_COLUMNS, row[1:]))
+                for doc in chunk_research(row[0], sections.get("user_input", ""), sections):
+                    key = chunk_id(doc.page_content, row[0])
+                    if key in wanted:
+                        found[key] = doc
+        return found
+
+
+def chroma_where(filter: Optional[Dict]) -> Optional[Dict]:
+    if not filter or len(filter) == 1:
+        return filter or None
+    return {"$and": [{key: value} for key, value in filter.items()]}
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Fuse BM25 and vector search results with reciprocal-rank fusion.
+
+    Both searches fetch ``fetch_k`` candidates restricted by ``filter`` (for
+    example ``{"research_id": 3}`` or ``{"section": "introduction"}``);
+    candidates are merged per chunk ID and the best ``k`` returned. Chunks
+    found only by BM25 are read back from the vector store by ID, or rebuilt
+    from MASTER.db for reports stored under random IDs.
+    """
+
+    vectorstore: Any
+    index: Any
+    k: int = 4
+    fetch_k: int = 20
+    rrf_k: int = 60
+    filter: Optional[Dict] = None
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        ranked = []
+        docs: Dict[str, Document] = {}
+        if self.vectorstore is not None:
+            hits = self.vectorstore.similarity_search(query, k=self.fetch_k, filter=chroma_where(self.filter))
+            ranked.append([chunk_id(doc.page_content, doc.metadata.get("research_id")) for doc in hits])
+            docs.update(zip(ranked[-1], hits))
+        if self.index is not None:
+            ranked.append([key for key, _ in self.index.search(query, self.fetch_k, self.filter)])
+
+        scores: Dict[str, float] = defaultdict(float)
+        for keys in ranked:
+            for rank, key in enumerate(keys):
+                scores[key] += 1.0 / (self.rrf_k + rank + 1)
+        best = [key for key, _ in heapq.nlargest(self.k, scores.items(), key=lambda item: item[1])]
+        docs.update(self._lookup([key for key in best if key not in docs]))
+        return [docs[key] for key in best if key in docs]
+
+    def _lookup(self, ids: List[str]) -> Dict[str, Document]:
+        if not ids:
+            return {}
+        found = self.index.documents(ids)
+        missing = [key for key in ids if key not in found]
+        if missing and self.vectorstore is not None:
+            stored = self.vectorstore.get(ids=missing)
+            for key, text, metadata in zip(stored["ids"], stored["documents"], stored["metadatas"]):
+                found[key] = Document(page_content=text, metadata=metadata or {})
+        missing = [key for key in ids if key not in found]
+        if missing:
+            found.update(self.index.read_back(missing))
+        return found
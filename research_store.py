@@ -0,0 +1,232 @@
+import sqlite3
+import threading
+
+# Columns shown in the previous-research table; report bodies are only loaded by id
+LIST_COLUMNS = ["research_id", "user_input", "created_at"]
+
+# Report columns mirrored into the research_fts full-text index
+FTS_COLUMNS = ["introduction", "quant_facts", "publications", "books", "prev_research"]
+
+# Newest matching reports ranked per search; see ResearchStore.search_research
+SEARCH_CANDIDATES = 2000
+
+
+def fts_query(text):
+    """Quote each term so user input such as ``GLP-1`` isn't parsed as FTS5 syntax."""
+    return " ".join('"' + term.replace('"', '""') + '"' for term in text.split())
+
+
+class ResearchStore:
+    """
+    Data access for MASTER.db over one long-lived connection.
+
+    The database runs in WAL mode so the Streamlit UI can read while a report
+    is being written, and listings use keyset pagination on ``research_id``
+    so a page costs the same however many reports exist.
+    """
+
+    def __init__(self, path="MASTER.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        with self._lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.create_research_table()
+
+    def create_research_table(self):
+        with self._lock, self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS Research (
+                    research_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_input TEXT,
+                    introduction TEXT,
+                    quant_facts TEXT,
+                    publications TEXT,
+                    books TEXT,
+                    prev_research TEXT,
+                    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                    metrics TEXT
+                )
+            """)
+            # Databases created before created_at existed; SQLite can't add a
+            # column with a CURRENT_TIMESTAMP default, so older rows stay NULL
+            columns = [row["name"] for row in self.conn.execute("PRAGMA table_info(Research)")]
+            if "created_at" not in columns:
+                self.conn.execute("ALTER TABLE Research ADD COLUMN created_at TEXT")
+            if "metrics" not in columns:
+                self.conn.execute("ALTER TABLE Research ADD COLUMN metrics TEXT")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS research_user_input ON Research (user_input)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS research_created_at ON Research (created_at)")
+        self.create_fts_table()
+        self.create_checkpoint_table()
+        self.create_messages_table()
+
+    def create_messages_table(self):
+        with self._lock, self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS Messages (
+                    message_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    session_id TEXT,
+                    role TEXT,
+                    content TEXT,
+                    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS messages_session_id ON Messages (session_id)")
+
+    def create_checkpoint_table(self):
+        with self._lock, self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS ResearchCheckpoints (
+                    user_input TEXT,
+                    section TEXT,
+                    output TEXT,
+                    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (user_input, section)
+                )
+            """)
+
+    def create_fts_table(self):
+        columns = ", ".join(FTS_COLUMNS)
+        new_columns = ", ".join(f"new.{column}" for column in FTS_COLUMNS)
+        old_columns = ", ".join(f"old.{column}" for column in FTS_COLUMNS)
+        with self._lock, self.conn:
+            exists = self.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'research_fts'"
+            ).fetchone()
+            self.conn.execute(f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS research_fts USING fts5(
+                    {columns}, content='Research', content_rowid='research_id'
+                )
+            """)
+            # Keep the external-content index in sync with every write to Research
+            self.conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS research_fts_insert AFTER INSERT ON Research BEGIN
+                    INSERT INTO research_fts (rowid, {columns}) VALUES (new.research_id, {new_columns});
+                END
+            """)
+            self.conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS research_fts_delete AFTER DELETE ON Research BEGIN
+                    INSERT INTO research_fts (research_fts, rowid, {columns}) VALUES ('delete', old.research_id, {old_columns});
+                END
+            """)
+            # Only edits to indexed columns reindex a row, not e.g. update_metrics.
+            # Recreated because databases from before that kept a trigger on every UPDATE
+            self.conn.execute("DROP TRIGGER IF EXISTS research_fts_update")
+            self.conn.execute(f"""
+                CREATE TRIGGER research_fts_update AFTER UPDATE OF {columns} ON Research BEGIN
+                    INSERT INTO research_fts (research_fts, rowid, {columns}) VALUES ('delete', old.research_id, {old_columns});
+                    INSERT INTO research_fts (rowid, {columns}) VALUES (new.research_id, {new_columns});
+                END
+            """)
+            if not exists:
+                # One-time backfill for databases written before the index existed
+                self.conn.execute("INSERT INTO research_fts (research_fts) VALUES ('rebuild')")
+
+    def insert_research(self, user_input, introduction, quant_facts, publications, books, prev_research, metrics=None):
+        """Insert a report; ``metrics`` is an optional JSON string of its timing and cost."""
+        with self._lock, self.conn:
+            cursor = self.conn.execute("""
+                INSERT INTO Research (user_input, introduction, quant_facts, publications, books, prev_research, created_at, metrics)
+                VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, ?)
+            """, (user_input, introduction, quant_facts, publications, books, prev_research, metrics))
+            return cursor.lastrowid
+
+    def update_metrics(self, research_id, metrics):
+        with self._lock, self.conn:
+            self.conn.execute("UPDATE Research SET metrics = ? WHERE research_id = ?", (metrics, research_id))
+
+    def list_research(self, before_id=None, limit=50):
+        """Return up to ``limit`` reports, newest first, older than ``before_id``."""
+        query = f"SELECT {', '.join(LIST_COLUMNS)} FROM Research"
+        params = []
+        if before_id is not None:
+            query += " WHERE research_id < ?"
+            params.append(before_id)
+        query += " ORDER BY research_id DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            return [dict(row) for row in self.conn.execute(query, params)]
+
+    def get_research(self, research_id):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT * FROM Research WHERE research_id = ?", (research_id,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def search_research(self, text, limit=20, candidates=SEARCH_CANDIDATES):
+        """
+        Rank reports matching ``text``, with a highlighted snippet from the best-matching column.
+
+        Only the newest ``candidates`` matching reports are ranked. Scoring
+        every match of a common term costs ~300 ms at 100k reports, while
+        the rowid bound keeps it under ~20 ms. ``search_is_limited`` tells
+        whether older matches were left out.
+        """
+        query = fts_query(text)
+        if not query:
+            return []
+        with self._lock:
+            rows = self.conn.execute("""
+                SELECT Research.research_id, Research.user_input, Research.created_at,
+                       snippet(research_fts, -1, '**', '**', '...', 16) AS snippet
+                FROM research_fts
+                JOIN Research ON Research.research_id = research_fts.rowid
+                WHERE research_fts MATCH :query AND research_fts.rowid >= COALESCE((
+                    SELECT rowid FROM research_fts WHERE research_fts MATCH :query
+                    ORDER BY rowid DESC LIMIT 1 OFFSET :skip
+                ), 0)
+                ORDER BY rank
+                LIMIT :limit
+            """, {"query": query, "skip": candidates - 1, "limit": limit})
+            return [dict(row) for row in rows]
+
+    def search_is_limited(self, text, candidates=SEARCH_CANDIDATES):
+        """True when more than ``candidates`` reports match, so ``search_research`` skipped older ones."""
+        query = fts_query(text)
+        if not query:
+            return False
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT rowid FROM research_fts WHERE research_fts MATCH ? ORDER BY rowid DESC LIMIT 1 OFFSET ?",
+                (query, candidates)
+            ).fetchone()
+        return row is not None
+
+    def find_research_id(self, user_input):
+        """Return the newest report id for an exact ``user_input``, or ``None``."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT research_id FROM Research WHERE user_input = ? ORDER BY research_id DESC LIMIT 1",
+                (user_input,)
+            ).fetchone()
+        return row["research_id"] if row else None
+
+    def save_checkpoint(self, user_input, section, output):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO ResearchCheckpoints (user_input, section, output) VALUES (?, ?, ?)",
+                (user_input, section, output)
+            )
+
+    def load_checkpoints(self, user_input):
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT section, output FROM ResearchCheckpoints WHERE user_input = ?", (user_input,)
+            )
+            return {row["section"]: row["output"] for row in rows}
+
+    def clear_checkpoints(self, user_input):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM ResearchCheckpoints WHERE user_input = ?", (user_input,))
+
+    def insert_messages(self, session_id, messages):
+        """Append ``(role, content)`` pairs to a chat session's transcript."""
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO Messages (session_id, role, content) VALUES (?, ?, ?)",
+                [(session_id, role, content) for role, content in messages]
+            )
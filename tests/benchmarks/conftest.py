@@ -0,0 +1,35 @@
+import pytest
+
+from research_store import ResearchStore
+
+INSERT_BATCH = 5000
+
+
+@pytest.fixture(scope="session")
+def research_db(tmp_path_factory, make_report):
+    """
+    Return ``build(rows)``, a ``ResearchStore`` over a MASTER.db of ``rows`` synthetic reports.
+
+    Each size is built once per session and shared by the store benchmarks.
+    """
+    stores = {}
+
+    def build(rows):
+        if rows not in stores:
+            store = ResearchStore(str(tmp_path_factory.mktemp(f"research_{rows}") / "MASTER.db"))
+            for start in range(0, rows, INSERT_BATCH):
+                reports = [make_report(i, words=40) for i in range(start, min(start + INSERT_BATCH, rows))]
+                with store.conn:
+                    store.conn.executemany(
+                        """
+                        INSERT INTO Research (user_input, introduction, quant_facts, publications, books, prev_research)
+                        VALUES (:user_input, :introduction, :quant_facts, :publications, :books, :prev_research)
+                        """,
+                        reports,
+                    )
+            stores[rows] = store
+        return stores[rows]
+
+    yield build
+    for store in stores.values():
+        store.conn.close()
@@ -0,0 +1,109 @@
+"""
+What a Streamlit rerun pays to set up the chat model, embeddings, research tools and agent.
+
+A small script run under AppTest times the setup on its first run (startup)
+and on each rerun, either building everything from scratch as every rerun
+did before ("uncached"), or through main.py's ``st.cache_resource``
+registry as it does now ("cached"). The live OpenAI, Wikipedia, PubMed,
+Scholar and UniProt clients are constructed with placeholder keys; none of
+them makes a request during setup. Setup is timed inside the script because
+``AppTest.run`` itself polls in ~100 ms steps, and outside a script run
+``st.cache_resource`` does not cache at all.
+"""
+import os
+import statistics
+
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from research_backends import Backends, set_backends
+from research_benchmark import MAIN_PATH, check_errors
+
+RERUNS = 10
+# main.VECTORSTORE_PATH; importing main would run the app script
+VECTORSTORE_PATH = "./chroma_db"
+
+SETUP_SCRIPT = """
+import time
+
+import streamlit as st
+
+import main
+from research_agents import build_base_tools, build_research_agent, build_response_cache
+from research_backends import get_backends
+
+started = time.perf_counter()
+if {cached}:
+    main.get_embeddings()
+    agent = main.get_research_agent("offline", "offline", main.MODEL, 0.2, None, None)
+else:
+    backends = get_backends()
+    backends.embeddings()
+    tools = build_base_tools("offline", build_response_cache("CACHE.db"), **backends.tool_options())
+    agent = build_research_agent(tools, backends.chat_model("offline", main.MODEL, 0.2))
+st.session_state.setdefault("setup_seconds", []).append(time.perf_counter() - started)
+st.session_state.setdefault("agents", set()).add(id(agent))
+"""
+
+
+@pytest.fixture
+def live_backends(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("OPENAI_API_KEY", "offline")
+    set_backends(Backends())
+    st.cache_resource.clear()
+    yield
+    st.cache_resource.clear()
+
+
+def run_setup(cached, reruns=RERUNS):
+    """Return the setup time of the first run and of each rerun, and how many distinct agents were built."""
+    at = AppTest.from_string(SETUP_SCRIPT.format(cached=cached), default_timeout=60)
+    for _ in range(reruns + 1):
+        at.run()
+        check_errors(at, "setup")
+    seconds = at.session_state["setup_seconds"]
+    return seconds[0], seconds[1:], len(at.session_state["agents"])
+
+
+@pytest.mark.parametrize("cached", [False, True], ids=["uncached", "cached"])
+def test_setup_per_rerun(benchmark, live_backends, cached):
+    benchmark.group = "research agent setup"
+    startup, reruns, agents = benchmark.pedantic(run_setup, args=(cached,), rounds=1, iterations=1)
+    benchmark.extra_info.update(startup_ms=startup * 1000, rerun_median_ms=statistics.median(reruns) * 1000)
+
+    assert agents == (1 if cached else RERUNS + 1)
+
+
+def test_cached_rerun_skips_setup(live_backends):
+    _, uncached, _ = run_setup(False)
+    _, cached, _ = run_setup(True)
+
+    assert statistics.median(cached) * 10 < statistics.median(uncached)
+
+
+def test_app_rerun_builds_nothing(offline_backends, monkeypatch):
+    at = AppTest.from_file(str(MAIN_PATH), default_timeout=60)
+    at.run()
+    check_errors(at, "startup")
+    builds = []
+    monkeypatch.setattr(offline_backends, "embeddings", lambda: builds.append("embeddings"))
+    monkeypatch.setattr(offline_backends, "chat_model", lambda *args: builds.append("chat_model"))
+
+    at.run()
+    check_errors(at, "rerun")
+
+    assert builds == []
+
+
+def test_sessions_share_one_vector_store(offline_backends):
+    os.makedirs(VECTORSTORE_PATH)
+    sessions = [AppTest.from_file(str(MAIN_PATH), default_timeout=60) for _ in range(3)]
+    for at in sessions:
+        at.run()
+        check_errors(at, "startup")
+
+    # A per-session version would cache a QA chain and agent for every browser session
+    assert {at.session_state["embeddings_version"] for at in sessions} == {VECTORSTORE_PATH}
+    assert len({id(at.session_state["embeddings_db"]) for at in sessions}) == 1
@@ -0,0 +1,65 @@
+"""
+Prompt size over a 50-turn chat with the app's summarizing memory.
+
+``ConversationBufferMemory`` resends every earlier turn, so each prompt is
+longer than the last. ``get_chat_session`` uses ``build_chat_memory``, a
+``ConversationSummaryBufferMemory`` that keeps the latest turns verbatim up
+to ``CHAT_MEMORY_TOKENS`` and folds older ones into a summary, so once that
+limit is reached the prompt stops growing.
+"""
+import pytest
+from langchain.agents import Tool
+from langchain.memory import ConversationBufferMemory
+from langchain_core.callbacks import BaseCallbackHandler
+
+from research_agents import CHAT_MEMORY_TOKENS, build_chat_agent, build_chat_memory, memoize_tools
+from research_fakes import FakeChatModel
+
+TURNS = 50
+
+MEMORIES = {
+    "buffer": lambda llm: ConversationBufferMemory(memory_key="chat_history"),
+    "summary_buffer": build_chat_memory,
+}
+
+
+class PromptSizes(BaseCallbackHandler):
+    """Largest prompt, in the model's reported tokens, sent during the current turn."""
+
+    def __init__(self):
+        self.largest = 0
+
+    def on_llm_end(self, response, **kwargs):
+        self.largest = max(self.largest, response.llm_output["token_usage"]["prompt_tokens"])
+
+
+def chat(memory_name):
+    llm = FakeChatModel(latency=0.0, tokens_per_second=1e6, answer_words=80)
+    wiki = Tool(
+        name="Wikipedia Research Tool",
+        func=lambda query: "Glucagon-like peptide-1 is an incretin hormone that lowers blood glucose.",
+        description="Useful for researching information on Wikipedia.",
+    )
+    agent = build_chat_agent(memoize_tools([wiki], {}), llm, MEMORIES[memory_name](llm))
+    sizes = []
+    for turn in range(TURNS):
+        handler = PromptSizes()
+        agent.run(input=f"Question {turn}: how does GLP-1 dosing change in cohort {turn}?", callbacks=[handler])
+        sizes.append(handler.largest)
+    return sizes
+
+
+@pytest.mark.parametrize("memory_name", list(MEMORIES))
+def test_prompt_size_over_a_long_chat(benchmark, memory_name):
+    benchmark.group = f"{TURNS}-turn chat"
+    sizes = benchmark.pedantic(chat, args=(memory_name,), rounds=1, iterations=1)
+    benchmark.extra_info.update(first_prompt_tokens=sizes[0], last_prompt_tokens=sizes[-1], max_prompt_tokens=max(sizes))
+
+    if memory_name == "buffer":
+        assert sizes[-1] > 5 * sizes[0]
+    else:
+        # Flat once the verbatim turns reach the limit: the last half of the
+        # chat never exceeds the first half's largest prompt
+        half = TURNS // 2
+        assert max(sizes[half:]) <= max(sizes[:half])
+        assert max(sizes) < sizes[0] + 2 * CHAT_MEMORY_TOKENS
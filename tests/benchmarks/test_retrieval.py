@@ -0,0 +1,91 @@
+"""
+Recall@k and query latency of BM25, vector and hybrid retrieval over synthetic reports.
+
+Two labelled question sets, each with exactly one right report:
+
+- "keyword" questions name a report's compound or trial ID (see ``synthetic_report``);
+- "passage" questions are a 12-word window from one of the report's chunks.
+
+Recall@k is the share of questions with a chunk of the right report among
+the top ``K`` hits. The vector store uses the hashing ``FakeEmbeddings``,
+which carries word overlap but no meaning, so it finds passages yet misses
+IDs and drags the fused keyword recall below BM25's; a real embedding model
+would rank those chunks too. 10k reports (about 90k chunks) run with
+``--run-slow``.
+"""
+import itertools
+import random
+
+import pytest
+from chromadb.api.client import SharedSystemClient
+from langchain_community.vectorstores import Chroma
+
+from research_fakes import FakeEmbeddings
+from research_pipeline import chunk_research, ingest_reports
+from research_retrieval import BM25Index, HybridRetriever
+
+K = 4
+QUESTIONS = 50
+PASSAGE_WORDS = 12
+INGEST_BATCH = 200
+
+
+def labelled_questions(reports, rng):
+    keyword, passage = [], []
+    for i, sections in rng.sample(list(reports.items()), QUESTIONS):
+        keyword.append((f"How much did trial tr-{i:05d} lower HbA1c?", i))
+        keyword.append((f"Which receptor does compound-{i:05d} act on?", i))
+        chunks = [doc for doc in chunk_research(i, sections["user_input"], sections)
+                  if doc.metadata["section"] in ("publications", "books")]
+        words = rng.choice(chunks).page_content.split()
+        start = rng.randrange(max(1, len(words) - PASSAGE_WORDS))
+        passage.append((" ".join(words[start:start + PASSAGE_WORDS]), i))
+    return {"keyword": keyword, "passage": passage}
+
+
+@pytest.fixture(scope="module", params=[100, 1000, pytest.param(10000, marks=pytest.mark.slow)])
+def corpus(request, tmp_path_factory, make_report):
+    reports = {i: make_report(i) for i in range(request.param)}
+    index = BM25Index()
+    vectordb = Chroma(
+        collection_name=f"reports_{request.param}",
+        embedding_function=FakeEmbeddings(),
+        persist_directory=str(tmp_path_factory.mktemp("chroma")),
+    )
+    for start in range(0, len(reports), INGEST_BATCH):
+        batch = [(i, reports[i]["user_input"], reports[i]) for i in range(start, min(start + INGEST_BATCH, len(reports)))]
+        ingest_reports(vectordb, batch)
+        for i, _, sections in batch:
+            index.add_research(i, sections)
+    yield len(reports), vectordb, index, labelled_questions(reports, random.Random(len(reports)))
+    SharedSystemClient.clear_system_cache()
+
+
+def retrieve(kind, vectordb, index):
+    """Return ``query -> research IDs of the top K hits`` for one retrieval strategy."""
+    if kind == "bm25":
+        return lambda query: [index.metadatas[index.positions[key]]["research_id"] for key, _ in index.search(query, K)]
+    if kind == "vector":
+        return lambda query: [doc.metadata["research_id"] for doc in vectordb.similarity_search(query, k=K)]
+    retriever = HybridRetriever(vectorstore=vectordb, index=index, k=K)
+    return lambda query: [doc.metadata["research_id"] for doc in retriever.invoke(query)]
+
+
+def recall(search, questions):
+    return sum(label in search(query) for query, label in questions) / len(questions)
+
+
+@pytest.mark.parametrize("kind", ["bm25", "vector", "hybrid"])
+def test_recall_and_latency(benchmark, corpus, kind):
+    reports, vectordb, index, questions = corpus
+    search = retrieve(kind, vectordb, index)
+    benchmark.group = f"retrieval over {reports} reports"
+
+    recalls = {name: recall(search, labelled) for name, labelled in questions.items()}
+    queries = itertools.cycle(query for labelled in questions.values() for query, _ in labelled)
+    benchmark.pedantic(lambda: search(next(queries)), rounds=2 * QUESTIONS, iterations=1)
+    benchmark.extra_info.update(reports=reports, chunks=len(index), **{f"recall@{K} {name}": value for name, value in recalls.items()})
+
+    if kind == "bm25":
+        assert recalls["keyword"] >= 0.95
+
@@ -0,0 +1,102 @@
+"""
+Previous-research table access and search at 10k and 100k reports, against the pandas scans they replaced.
+
+Before, every rerun called ``pd.read_sql_query("SELECT * FROM Research")``
+for the table, again for the selectbox options and again to render one
+report, and finding a report meant filtering that frame. Now a page is a
+keyset query over ``research_id``, a report is one primary-key lookup and
+search goes through the ``research_fts`` index. 100k reports run with
+``--run-slow``.
+"""
+import random
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from research_store import FTS_COLUMNS
+
+PAGE_SIZE = 50
+
+SIZES = [10_000, pytest.param(100_000, marks=pytest.mark.slow)]
+
+
+def read_research_table(path):
+    """The pre-ResearchStore listing, kept here as the baseline."""
+    with sqlite3.connect(path) as conn:
+        return pd.read_sql_query("SELECT * FROM Research", conn)
+
+
+def render_before(path, user_input):
+    table = read_research_table(path)
+    options = list(read_research_table(path).user_input)
+    report = read_research_table(path).query("user_input == @user_input").iloc[0]
+    return table, options, report
+
+
+def render_after(store, research_id):
+    first = store.list_research(limit=PAGE_SIZE + 1)
+    older = store.list_research(before_id=first[PAGE_SIZE - 1]["research_id"], limit=PAGE_SIZE + 1)
+    return first, older, store.get_research(research_id)
+
+
+@pytest.mark.parametrize("rows", SIZES)
+def test_render_previous_research_pandas_scan(benchmark, research_db, rows):
+    store = research_db(rows)
+    benchmark.group = f"previous research rerun, {rows} reports"
+    _, options, report = benchmark.pedantic(render_before, args=(store.path, "compound-00042"), rounds=3, iterations=1)
+    assert len(options) == rows
+    assert report["user_input"] == "compound-00042"
+
+
+@pytest.mark.parametrize("rows", SIZES)
+def test_render_previous_research_keyset(benchmark, research_db, rows):
+    store = research_db(rows)
+    benchmark.group = f"previous research rerun, {rows} reports"
+    ids = iter(random.Random(rows).choices(range(1, rows + 1), k=1000))
+    first, older, report = benchmark.pedantic(lambda: render_after(store, next(ids)), rounds=200, iterations=1)
+    assert len(first) == len(older) == PAGE_SIZE + 1
+    assert first[0]["research_id"] == rows
+    assert report is not None
+
+
+@pytest.mark.parametrize("before_id", [None, 100], ids=["newest page", "oldest page"])
+def test_page_cost_does_not_depend_on_offset(benchmark, research_db, before_id):
+    store = research_db(10_000)
+    benchmark.group = "list_research page, 10000 reports"
+    rows = benchmark(store.list_research, before_id=before_id, limit=PAGE_SIZE)
+    assert len(rows) == PAGE_SIZE
+
+
+# Search terms: one report's trial ID, and words shared by many reports
+SEARCHES = ["tr-04242", "incretin secretion"]
+
+
+def search_before(path, text):
+    table = read_research_table(path)
+    matches = pd.Series(True, index=table.index)
+    for term in text.split():
+        matches &= pd.concat(
+            [table[column].str.contains(term, case=False, regex=False) for column in FTS_COLUMNS], axis=1
+        ).any(axis=1)
+    return table[matches].head(20)
+
+
+@pytest.mark.parametrize("rows", SIZES)
+@pytest.mark.parametrize("text", SEARCHES)
+def test_search_pandas_scan(benchmark, research_db, rows, text):
+    store = research_db(rows)
+    benchmark.group = f"search {text!r}, {rows} reports"
+    found = benchmark.pedantic(search_before, args=(store.path, text), rounds=3, iterations=1)
+    assert len(found) > 0
+
+
+@pytest.mark.parametrize("rows", SIZES)
+@pytest.mark.parametrize("text", SEARCHES)
+def test_search_fts(benchmark, research_db, rows, text):
+    store = research_db(rows)
+    benchmark.group = f"search {text!r}, {rows} reports"
+    found = benchmark.pedantic(store.search_research, args=(text,), rounds=20, iterations=1)
+    assert len(found) > 0
+    if text.startswith("tr-"):
+        assert [row["user_input"] for row in found] == ["compound-04242"]
@@ -0,0 +1,60 @@
+"""
+Time to first token versus time to the full answer with a fake streaming model.
+
+Before streaming, nothing was drawn until the whole reply had arrived, so
+the wait the user saw was the total time. ``StreamHandler`` now shows the
+first token after roughly the model's latency.
+"""
+import time
+
+from research_agents import StreamHandler
+from research_fakes import FakeChatModel
+
+LATENCY = 0.2
+TOKENS_PER_SECOND = 100
+ANSWER_WORDS = 60
+
+
+class Placeholder:
+    def __init__(self):
+        self.renders = []
+
+    def markdown(self, text):
+        self.renders.append((time.perf_counter(), text))
+
+
+def stream_reply(placeholder=None):
+    llm = FakeChatModel(latency=LATENCY, tokens_per_second=TOKENS_PER_SECOND, answer_words=ANSWER_WORDS)
+    handler = StreamHandler(placeholder)
+    reply = llm.invoke("Summarize GLP-1 receptor agonists.", config={"callbacks": [handler]}).content
+    handler.finished_at = time.perf_counter()
+    return handler, reply
+
+
+def test_time_to_first_token(benchmark):
+    benchmark.group = "chat reply latency"
+    timings = {}
+
+    def run():
+        handler, _ = stream_reply()
+        timings.setdefault("ttft", []).append(handler.time_to_first_token)
+        timings.setdefault("total", []).append(handler.finished_at - handler.started_at)
+
+    benchmark.pedantic(run, rounds=3, iterations=1)
+    ttft, total = max(timings["ttft"]), min(timings["total"])
+    benchmark.extra_info.update(time_to_first_token_s=ttft, total_s=total)
+
+    assert ttft < LATENCY + 0.1
+    assert ttft < total / 2
+
+
+def test_placeholder_redraws_are_throttled():
+    placeholder = Placeholder()
+    handler, reply = stream_reply(placeholder)
+
+    assert "".join(handler.chunks) == reply
+    assert placeholder.renders[0][0] - handler.started_at < LATENCY + 0.1
+    # 60 tokens over ~0.6 s at one redraw per 0.1 s
+    assert len(placeholder.renders) < 15
+    gaps = [later - earlier for (earlier, _), (later, _) in zip(placeholder.renders, placeholder.renders[1:])]
+    assert min(gaps) >= handler.min_interval * 0.9
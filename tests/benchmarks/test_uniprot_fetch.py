@@ -0,0 +1,44 @@
+"""
+Sequential versus concurrent per-entry fetches against the local stub server.
+
+Each stub response waits ``LATENCY`` seconds, standing in for the round trip
+to rest.uniprot.org, so the concurrent wrapper should approach one round
+trip per batch of ``max_concurrency`` entries instead of one per entry.
+"""
+import time
+
+import pytest
+
+from langchain_community.utilities.uniprot import UniProtAPIWrapper
+
+LATENCY = 0.02
+
+
+def fetch_wrapper(server, options, k, concurrency):
+    return UniProtAPIWrapper(bulk=False, top_k_results=k, max_concurrency=concurrency, **options(server))
+
+
+@pytest.mark.parametrize("k", [3, 10, 50])
+@pytest.mark.parametrize("concurrency", [1, 8], ids=["sequential", "concurrent"])
+def test_fetch_entries(benchmark, uniprot_stub, stub_urls, make_entry, k, concurrency):
+    entries = [make_entry(f"P{i:05d}") for i in range(k)]
+    wrapper = fetch_wrapper(uniprot_stub(entries, latency=LATENCY), stub_urls, k, concurrency)
+    benchmark.group = f"uniprot per-entry fetch, k={k}"
+
+    results = benchmark.pedantic(wrapper.search_proteins, args=("GLP-1",), rounds=3, iterations=1)
+
+    assert [result["Primary Accession"] for result in results] == [entry["primaryAccession"] for entry in entries]
+
+
+def test_concurrent_fetch_is_faster(uniprot_stub, stub_urls, make_entry):
+    entries = [make_entry(f"P{i:05d}") for i in range(10)]
+    server = uniprot_stub(entries, latency=LATENCY)
+    timings = {}
+    for concurrency in (1, 8):
+        wrapper = fetch_wrapper(server, stub_urls, 10, concurrency)
+        started = time.perf_counter()
+        wrapper.search_proteins("GLP-1")
+        timings[concurrency] = time.perf_counter() - started
+
+    # 11 round trips sequentially against 3 (search + two batches) concurrently
+    assert timings[8] < timings[1] / 2
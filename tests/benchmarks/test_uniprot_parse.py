@@ -0,0 +1,112 @@
+"""
+Decode and parse large UniProtKB entries with the current parser and the original one.
+
+The entries are synthetic but sized like P69905 (hemoglobin alpha, many
+structures), P04637 (p53, hundreds of references) and Q8WZ42 (titin, a
+34,350-residue sequence). A recorded entry saved as
+``tests/fixtures/uniprot/<accession>.json`` is used instead when present.
+"""
+import json
+from pathlib import Path
+
+import pytest
+
+from langchain_community.utilities.uniprot import UniProtAPIWrapper, json_loads
+
+RECORDED = Path(__file__).resolve().parent.parent / "fixtures" / "uniprot"
+
+# accession: (residues, structures, references, comments)
+LARGE_ENTRIES = {
+    "P69905": (142, 350, 80, 10),
+    "P04637": (393, 250, 450, 20),
+    "Q8WZ42": (34350, 120, 90, 15),
+}
+
+
+def legacy_parse_protein_details(data):
+    """parse_protein_details as it was before the single-pass rewrite, kept as the baseline."""
+    protein_info = data.get("proteinDescription", {}).get("recommendedName", {}).get("fullName", {}).get("value", "")
+    organism_info = data.get("organism", {}).get("scientificName", "")
+    function_info = data.get("comments", [])
+    sequence_info = data.get("sequence", {}).get("value", "")
+    references_info = data.get("references", [])
+    structure_info = [ref for ref in data.get("uniProtKBCrossReferences", []) if ref.get("database") == "PDB"]
+
+    functions = [
+        comment.get('texts', [{}])[0].get('value', 'N/A')
+        for comment in function_info
+        if comment.get("commentType") == "FUNCTION"
+    ]
+    function_summary = "\n".join(functions) if functions else "No function available"
+
+    subcellular_locations = [
+        loc.get('location', {}).get('value', 'N/A')
+        for comment in function_info
+        if comment.get("commentType") == "SUBCELLULAR LOCATION"
+        for loc in comment.get('subcellularLocations', [])
+    ]
+    subcellular_location_summary = "\n".join(subcellular_locations) if subcellular_locations else "No subcellular location available"
+
+    domains = [
+        comment.get('texts', [{}])[0].get('value', 'N/A')
+        for comment in function_info
+        if comment.get("commentType") == "DOMAIN"
+    ]
+    domain_summary = "\n".join(domains) if domains else "No domain information available"
+
+    pubmed_citations = [
+        {
+            "title": ref.get('citation', {}).get('title', 'N/A'),
+            "authors": ", ".join(ref.get('citation', {}).get('authors', [])),
+            "journal": ref.get('citation', {}).get('journal', 'N/A'),
+            "pubmed_id": next((cr.get('id') for cr in ref.get('citation', {}).get('citationCrossReferences', []) if cr.get('database') == 'PubMed'), 'N/A'),
+            "doi": next((cr.get('id') for cr in ref.get('citation', {}).get('citationCrossReferences', []) if cr.get('database') == 'DOI'), 'N/A')
+        }
+        for ref in references_info
+    ]
+
+    return {
+        "Primary Accession": data.get("primaryAccession", ""),
+        "UniProtKB ID": data.get("uniProtkbId", ""),
+        "Protein Name": protein_info,
+        "Organism": organism_info,
+        "Function": function_summary,
+        "Subcellular Location": subcellular_location_summary,
+        "Domains": domain_summary,
+        "Sequence": sequence_info,
+        "Structures": structure_info,
+        "PubMed Citations": pubmed_citations
+    }
+
+
+@pytest.fixture(scope="module", params=list(LARGE_ENTRIES))
+def raw_entry(request, make_entry):
+    recorded = RECORDED / f"{request.param}.json"
+    if recorded.exists():
+        return request.param, recorded.read_bytes()
+    residues, structures, references, comments = LARGE_ENTRIES[request.param]
+    entry = make_entry(request.param, residues=residues, structures=structures, references=references, comments=comments)
+    return request.param, json.dumps(entry).encode("utf-8")
+
+
+WRAPPER = UniProtAPIWrapper()
+FUNCTION_ONLY = UniProtAPIWrapper(parse_fields=["Function"])
+
+PARSERS = {
+    "legacy": lambda raw: legacy_parse_protein_details(json.loads(raw)),
+    "current": lambda raw: WRAPPER.parse_protein_details(json_loads(raw)),
+    "current, Function only": lambda raw: FUNCTION_ONLY.parse_protein_details(json_loads(raw)),
+}
+
+
+@pytest.mark.parametrize("parser", list(PARSERS))
+def test_decode_and_parse(benchmark, raw_entry, parser):
+    accession, raw = raw_entry
+    benchmark.group = f"decode + parse {accession} ({len(raw) // 1024} KiB)"
+    parsed = benchmark(PARSERS[parser], raw)
+    assert parsed["Primary Accession"] == accession
+
+
+def test_current_parser_matches_legacy(raw_entry):
+    _, raw = raw_entry
+    assert WRAPPER.parse_protein_details(json_loads(raw)) == legacy_parse_protein_details(json.loads(raw))
@@ -0,0 +1,150 @@
+import json
+
+import pytest
+import streamlit as st
+
+from research_backends import Backends, set_backends
+from research_fakes import FIXTURES_DIR, CallCounter, OfflineBackends, StubServer, filler
+
+
+def pytest_addoption(parser):
+    parser.addoption("--run-slow", action="store_true", help="also run the full-size benchmarks")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: full-size benchmark, only run with --run-slow")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--run-slow"):
+        return
+    skip = pytest.mark.skip(reason="full-size benchmark, pass --run-slow")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip)
+
+
+def uniprot_entry(accession, residues=150, structures=3, references=3, comments=3):
+    """A UniProtKB JSON entry with every field ``parse_protein_details`` reads."""
+    return {
+        "primaryAccession": accession,
+        "uniProtkbId": f"{accession}_HUMAN",
+        "organism": {"scientificName": "Homo sapiens", "taxonId": 9606},
+        "proteinDescription": {"recommendedName": {"fullName": {"value": f"Protein {accession}"}}},
+        "comments": [
+            comment
+            for i in range(comments)
+            for comment in (
+                {"commentType": "FUNCTION", "texts": [{"value": f"Function {i} of {accession}."}]},
+                {"commentType": "SUBCELLULAR LOCATION", "subcellularLocations": [
+                    {"location": {"value": f"Compartment {i}"}}, {"location": {"value": "Cytoplasm"}},
+                ]},
+                {"commentType": "DOMAIN", "texts": [{"value": f"Domain {i} binds its ligand."}]},
+                {"commentType": "PTM", "texts": [{"value": f"Phosphorylated at site {i}."}]},
+            )
+        ],
+        "sequence": {"value": ("MVLSPADKTNVKAAWGKVGAHAGEYGAEALERMFLSFPTTKTYFPHF" * (residues // 47 + 1))[:residues]},
+        "uniProtKBCrossReferences": [
+            {"database": "PDB" if i % 2 == 0 else "EMBL", "id": f"{i:04d}",
+             "properties": [{"key": "Method", "value": "X-ray"}, {"key": "Resolution", "value": "2.0 A"}]}
+            for i in range(structures * 2)
+        ],
+        "references": [
+            {"citation": {
+                "title": f"Study {i} of {accession}",
+                "authors": [f"Author {i}", f"Author {i + 1}"],
+                "journal": "J Biol Chem",
+                "citationCrossReferences": [
+                    {"database": "PubMed", "id": str(1000000 + i)},
+                    {"database": "DOI", "id": f"10.1000/{accession}.{i}"},
+                ],
+            }}
+            for i in range(references)
+        ],
+    }
+
+
+@pytest.fixture(scope="session")
+def make_entry():
+    return uniprot_entry
+
+
+def synthetic_report(i, words=120):
+    """
+    Report sections for a made-up compound ``compound-<i>``, the same shape main.py stores.
+
+    Each report names its own compound and trial, so a question about
+    either has exactly one right report; the rest is shared vocabulary.
+    """
+    topic = f"compound-{i:05d}"
+    return {
+        "user_input": topic,
+        "introduction": f"{topic} is an investigational agonist of receptor-{i % 97}. " + filler(f"intro {i}", words * 2),
+        "quant_facts": f"In trial tr-{i:05d}, {topic} lowered HbA1c by {i % 17}.{i % 10} percent. " + filler(f"facts {i}", words),
+        "publications": filler(f"papers {i}", words),
+        "books": filler(f"books {i}", words // 2),
+        "prev_research": "",
+    }
+
+
+@pytest.fixture(scope="session")
+def make_report():
+    return synthetic_report
+
+
+@pytest.fixture
+def uniprot_stub(tmp_path):
+    """
+    Start a ``StubServer`` replaying the given UniProt entries.
+
+    The search fixture holds every entry and each accession also gets its
+    own entry fixture, so the bulk and per-entry paths see the same data.
+    """
+    servers = []
+
+    def start(entries, latency=0.0):
+        fixtures = tmp_path / f"fixtures{len(servers)}"
+        fixtures.mkdir()
+        (fixtures / "uniprot_search.json").write_text(json.dumps({"results": entries}))
+        for entry in entries:
+            (fixtures / f"uniprot_entry_{entry['primaryAccession']}.json").write_text(json.dumps(entry))
+        server = StubServer(fixtures, CallCounter(), latency=latency).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+def stub_wrapper_options(server):
+    return {
+        "base_url_search": f"{server.url}/uniprot/uniprotkb/search?",
+        "base_url_entry": f"{server.url}/uniprot/uniprotkb/",
+    }
+
+
+@pytest.fixture
+def stub_urls():
+    return stub_wrapper_options
+
+
+@pytest.fixture
+def offline_backends(tmp_path, monkeypatch):
+    """
+    Point main.py's backends at the fakes and a stub server replaying ``benchmark_fixtures/``.
+
+    Runs from an empty working directory with no model latency, and clears
+    Streamlit's cached resources before and after.
+    """
+    monkeypatch.chdir(tmp_path)
+    counter = CallCounter()
+    with StubServer(FIXTURES_DIR, counter) as server:
+        backends = OfflineBackends(server.url, counter, latency=0.0, tokens_per_second=1e6)
+        set_backends(backends)
+        st.cache_resource.clear()
+        try:
+            yield backends
+        finally:
+            set_backends(Backends())
+            st.cache_resource.clear()
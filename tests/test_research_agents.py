@@ -0,0 +1,144 @@
+import pytest
+from langchain.agents import Tool
+from langchain_community.utilities.pubmed import PubMedAPIWrapper
+from langchain_core.callbacks import BaseCallbackHandler
+
+from research_agents import (
+    PREVIOUS_RESEARCH_TOOL,
+    RateLimiter,
+    build_base_tools,
+    build_planned_runner,
+    memoize_tools,
+)
+from research_cache import ResponseCache
+from research_fakes import FIXTURES_DIR, CallCounter, FakeChatModel, StubServer
+
+
+class CountingLimiter(RateLimiter):
+    def __init__(self):
+        super().__init__(rate=1000.0, burst=1000)
+        self.acquired = 0
+
+    def acquire(self):
+        self.acquired += 1
+        super().acquire()
+
+
+def test_ncbi_limiter_is_charged_per_http_request(tmp_path):
+    limiter = CountingLimiter()
+    counter = CallCounter()
+    with StubServer(FIXTURES_DIR, counter) as server:
+        pubmed = PubMedAPIWrapper(
+            base_url_esearch=f"{server.url}/pubmed/esearch.fcgi?",
+            base_url_efetch=f"{server.url}/pubmed/efetch.fcgi?",
+        )
+        tools = build_base_tools(
+            "test-key", ResponseCache(str(tmp_path / "CACHE.db")), {"ncbi": limiter}, wrappers={"pubmed": pubmed}
+        )
+        tool = next(tool for tool in tools if tool.name.startswith("Pubmed"))
+        tool.func("GLP-1")
+        tool.func("GLP-1")
+
+    # One esearch plus an efetch per hit; the repeat is a cache hit
+    assert counter.snapshot()["pubmed"] == 1 + pubmed.top_k_results
+    assert limiter.acquired == counter.snapshot()["pubmed"]
+
+
+def counting_tool(name, outputs):
+    calls = []
+
+    def run(query):
+        calls.append(query)
+        return outputs[min(len(calls), len(outputs)) - 1]
+    return Tool(name=name, func=run, description=name), calls
+
+
+def test_memoized_tools_reuse_lookups_but_not_failures():
+    wiki, wiki_calls = counting_tool("Wikipedia Research Tool", ["GLP-1 is an incretin."])
+    pubmed, pubmed_calls = counting_tool(
+        "Pubmed Science and Medical Journal Research Tool", ["PubMed exception: HTTP Error 429", "Results for GLP-1"]
+    )
+    tools = {tool.name: tool for tool in memoize_tools([wiki, pubmed], {})}
+
+    for query in ["GLP-1", "  glp-1 "]:
+        tools[wiki.name].func(query)
+        tools[pubmed.name].func(query)
+
+    assert wiki_calls == ["GLP-1"]
+    assert tools[pubmed.name].func("GLP-1") == "Results for GLP-1"
+    assert len(pubmed_calls) == 2
+
+
+def test_previous_research_is_not_memoized():
+    # Its answers change as reports are ingested during the session
+    previous, calls = counting_tool(PREVIOUS_RESEARCH_TOOL, ["No reports yet.", "GLP-1 was researched."])
+    [tool] = memoize_tools([previous], {})
+
+    assert tool is previous
+    assert [tool.func("GLP-1"), tool.func("GLP-1")] == ["No reports yet.", "GLP-1 was researched."]
+
+
+class Prompts(BaseCallbackHandler):
+    def __init__(self):
+        self.sent = []
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self.sent.extend(str(message.content) for batch in messages for message in batch)
+
+
+def planned_runner(outputs):
+    tools = []
+    for name, output in outputs.items():
+        def run(query, output=output):
+            if isinstance(output, Exception):
+                raise output
+            return output
+        tools.append(Tool(name=name, func=run, description=name))
+    fallbacks = []
+
+    def fallback(prompt, callbacks):
+        fallbacks.append(prompt)
+        return "agent answer"
+
+    llm = FakeChatModel(latency=0.0, tokens_per_second=1e6, answer_words=10)
+    return build_planned_runner(tools, llm, fallback=fallback), fallbacks
+
+
+def test_planned_sources_returning_failure_messages_fall_back():
+    run, fallbacks = planned_runner({
+        "Pubmed Science and Medical Journal Research Tool": "PubMed exception: HTTP Error 429",
+        "Google Scholar Search Tool": "No good Google Scholar Result was found",
+        "Wikipedia Research Tool": RuntimeError("timed out"),
+    })
+    sources = [(name, "GLP-1") for name in (
+        "Pubmed Science and Medical Journal Research Tool", "Google Scholar Search Tool", "Wikipedia Research Tool"
+    )]
+
+    assert run("List GLP-1 papers.", sources, []) == "agent answer"
+    assert fallbacks == ["List GLP-1 papers."]
+
+
+def test_failed_sources_are_left_out_of_the_notes():
+    run, fallbacks = planned_runner({
+        "Wikipedia Research Tool": "GLP-1 is an incretin hormone.",
+        "Pubmed Science and Medical Journal Research Tool": "No good PubMed Result was found",
+    })
+    prompts = Prompts()
+
+    sources = [("Wikipedia Research Tool", "GLP-1"), ("Pubmed Science and Medical Journal Research Tool", "GLP-1")]
+    run("Introduce GLP-1.", sources, [prompts])
+
+    [prompt] = prompts.sent
+    assert "GLP-1 is an incretin hormone." in prompt
+    assert "No good PubMed Result" not in prompt
+    assert fallbacks == []
+
+
+def test_all_sources_failing_without_fallback_raises():
+    run = build_planned_runner(
+        [Tool(name="Google Scholar Search Tool", func=lambda query: "No good Google Scholar Result was found", description="")],
+        FakeChatModel(latency=0.0),
+    )
+
+    with pytest.raises(RuntimeError, match="Google Scholar Search Tool"):
+        run("List GLP-1 papers.", [("Google Scholar Search Tool", "GLP-1")], [])
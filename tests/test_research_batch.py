@@ -0,0 +1,74 @@
+import pytest
+from chromadb.api.client import SharedSystemClient
+from langchain_community.vectorstores import Chroma
+
+from research_batch import SAVED_SECTIONS, research_topic, resume_ingest
+from research_fakes import FakeEmbeddings
+from research_store import ResearchStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ResearchStore(str(tmp_path / "MASTER.db"))
+    yield store
+    store.conn.close()
+
+
+@pytest.fixture
+def chroma(tmp_path):
+    yield Chroma(
+        collection_name="reports", embedding_function=FakeEmbeddings(), persist_directory=str(tmp_path / "chroma_db")
+    )
+    SharedSystemClient.clear_system_cache()
+
+
+def save_report(store, report, checkpoints=True):
+    topic = report["user_input"]
+    if checkpoints:
+        store.save_checkpoint(topic, "intro", report["introduction"])
+    return store.insert_research(
+        topic, report["introduction"], report["quant_facts"], report["publications"], report["books"], ""
+    )
+
+
+def test_report_saved_before_a_crash_is_ingested_on_resume(store, chroma, make_report):
+    # Inserted, but the run stopped before its chunks were embedded
+    crashed = make_report(1)
+    research_id = save_report(store, crashed)
+    finished = make_report(2)
+    save_report(store, finished, checkpoints=False)
+
+    assert resume_ingest(store, chroma, ["compound-00001", "compound-00002", "compound-00003"]) == ["compound-00001"]
+
+    ingested = chroma.get()["metadatas"]
+    assert ingested and {metadata["research_id"] for metadata in ingested} == {research_id}
+    assert store.load_checkpoints("compound-00001") == {}
+
+
+def test_resume_skips_chunks_already_ingested(store, chroma, make_report):
+    report = make_report(1)
+    save_report(store, report)
+    assert resume_ingest(store, chroma, ["compound-00001"]) == ["compound-00001"]
+    count = len(chroma.get()["ids"])
+
+    # Crashed after embedding but before the checkpoints were cleared
+    store.save_checkpoint("compound-00001", "intro", report["introduction"])
+    assert resume_ingest(store, chroma, ["compound-00001"]) == ["compound-00001"]
+
+    assert len(chroma.get()["ids"]) == count
+    assert resume_ingest(store, chroma, ["compound-00001"]) == []
+
+
+def test_only_saved_sections_are_researched(store):
+    prompts = []
+
+    def agent(inputs, callbacks=None):
+        prompts.append(inputs["input"])
+        return {"output": f"section {len(prompts)}"}
+
+    results = research_topic("GLP-1", agent, store, [], section_workers=2)
+
+    assert sorted(results) == sorted(SAVED_SECTIONS)
+    assert len(prompts) == len(SAVED_SECTIONS)
+    assert not any("UniProt" in prompt or "Google Scholar" in prompt for prompt in prompts)
+    assert sorted(store.load_checkpoints("GLP-1")) == sorted(SAVED_SECTIONS)
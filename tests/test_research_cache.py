@@ -0,0 +1,176 @@
+import pytest
+
+import research_cache
+from research_agents import build_base_tools, tool_failed
+from research_cache import CachedEmbeddings, ResponseCache
+from research_fakes import CallCounter, FakeEmbeddings
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResponseCache(str(tmp_path / "CACHE.db"))
+
+
+def counting(outputs):
+    calls = []
+
+    def func(query):
+        calls.append(query)
+        return outputs[len(calls) - 1]
+    return func, calls
+
+
+def test_cached_skips_values_rejected_by_should_cache(cache):
+    func, calls = counting(["PubMed exception: HTTP Error 429", "Results for GLP-1", "unused"])
+    wrapped = cache.cached("pubmed", func, should_cache=lambda value: not tool_failed(value))
+
+    assert wrapped("GLP-1") == "PubMed exception: HTTP Error 429"
+    assert cache.get("pubmed", "GLP-1") is None
+    assert wrapped("GLP-1") == "Results for GLP-1"
+    assert wrapped("GLP-1") == "Results for GLP-1"
+    assert calls == ["GLP-1", "GLP-1"]
+
+
+@pytest.mark.parametrize("output", [
+    "PubMed exception: <urlopen error timed out>",
+    "No good PubMed Result was found",
+    "No good Wikipedia Search Result was found",
+    "No good Google Scholar Result was found",
+    "UniProt exception: 503 Server Error",
+    "No good UniProt Result was found",
+])
+def test_tool_failure_messages(output):
+    assert tool_failed(output)
+
+
+def test_tool_answers_are_not_failures():
+    assert not tool_failed("Page: Glucagon-like peptide-1\nSummary: GLP-1 is a hormone.")
+    assert not tool_failed(["not", "a", "string"])
+
+
+class FailingWrapper:
+    def __init__(self, output):
+        self.output = output
+        self.calls = 0
+
+    def run(self, query):
+        self.calls += 1
+        return self.output
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(research_cache.time, "time", clock)
+    return clock
+
+
+def test_entries_expire_after_their_namespace_ttl(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / "CACHE.db"), ttls={"Wikipedia Research Tool": 60}, default_ttl=600)
+    cache.set("Wikipedia Research Tool", "GLP-1", "wiki answer")
+    cache.set("Google Scholar Search Tool", "GLP-1", "scholar answer")
+
+    clock.advance(59)
+    assert cache.get("Wikipedia Research Tool", "GLP-1") == "wiki answer"
+
+    clock.advance(2)
+    assert cache.get("Wikipedia Research Tool", "GLP-1") is None
+    assert cache.get("Google Scholar Search Tool", "GLP-1") == "scholar answer"
+
+    clock.advance(600)
+    assert cache.get("Google Scholar Search Tool", "GLP-1") is None
+    assert cache.stats()["Wikipedia Research Tool"] == {"hits": 1, "misses": 1}
+
+
+def test_least_recently_read_entries_are_evicted_first(tmp_path, clock):
+    # Each payload is 100 bytes of JSON; the cache holds three
+    cache = ResponseCache(str(tmp_path / "CACHE.db"), max_bytes=350)
+    for query in ["a", "b", "c"]:
+        cache.set("tool", query, "x" * 98)
+        clock.advance(1)
+    cache.get("tool", "a")
+    clock.advance(1)
+
+    cache.set("tool", "d", "x" * 98)
+
+    assert [query for query in "abcd" if cache.get("tool", query) is not None] == ["a", "c", "d"]
+
+
+def test_running_size_tracks_replacements_and_expiry(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / "CACHE.db"), default_ttl=60)
+    cache.set("tool", "a", "x" * 98)
+    cache.set("tool", "a", "x" * 198)
+    cache.set("tool", "b", "x" * 48)
+    assert cache._size == cache._stored_size() == 250
+
+    clock.advance(61)
+    cache.get("tool", "a")
+    assert cache._size == cache._stored_size() == 50
+
+    # A reopened cache starts from what is on disk
+    assert ResponseCache(str(tmp_path / "CACHE.db"))._size == 50
+
+
+def test_base_tools_do_not_cache_failures(cache):
+    wiki = FailingWrapper("No good Wikipedia Search Result was found")
+    tools = {tool.name: tool for tool in build_base_tools("test-key", cache, wrappers={"wikipedia": wiki})}
+
+    tools["Wikipedia Research Tool"].func("GLP-1")
+    tools["Wikipedia Research Tool"].func("GLP-1")
+
+    assert wiki.calls == 2
+
+
+def test_cached_embeddings_skip_upstream_on_second_pass(tmp_path):
+    counter = CallCounter()
+    upstream = FakeEmbeddings(counter=counter)
+    texts = [f"GLP-1 receptor agonists chunk {i}" for i in range(50)]
+
+    first = CachedEmbeddings(upstream, path=str(tmp_path / "CACHE.db")).embed_documents(texts + texts[:5])
+    assert counter.snapshot() == {"openai.embeddings": 1}
+
+    # A fresh wrapper, as after a restart, reads the vectors back from SQLite
+    cached = CachedEmbeddings(upstream, path=str(tmp_path / "CACHE.db"))
+    second = cached.embed_documents(texts)
+
+    assert counter.snapshot() == {"openai.embeddings": 1}
+    assert cached.stats() == {"hits": 50, "misses": 0, "hit_rate": 1.0}
+    for vector, original in zip(second, first):
+        assert vector == pytest.approx(original, abs=1e-6)
+
+
+def test_cached_embeddings_send_only_misses_upstream(tmp_path):
+    sent = []
+
+    class Recording(FakeEmbeddings):
+        def embed_documents(self, texts):
+            sent.append(list(texts))
+            return super().embed_documents(texts)
+
+    cached = CachedEmbeddings(Recording(), path=str(tmp_path / "CACHE.db"))
+    cached.embed_documents(["insulin", "glucagon"])
+    cached.embed_documents(["glucagon", "incretin", "incretin"])
+
+    assert sent == [["insulin", "glucagon"], ["incretin"]]
+
+
+def test_cached_embeddings_keep_queries_and_documents_apart(tmp_path):
+    counter = CallCounter()
+    cached = CachedEmbeddings(FakeEmbeddings(counter=counter), path=str(tmp_path / "CACHE.db"))
+
+    cached.embed_documents(["GLP-1"])
+    cached.embed_query("GLP-1")
+    cached.embed_query("GLP-1")
+
+    assert counter.snapshot() == {"openai.embeddings": 2}
@@ -0,0 +1,147 @@
+import json
+import threading
+import uuid
+
+import pytest
+from langchain.agents import Tool
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+import research_metrics
+from research_agents import build_research_agent
+from research_fakes import FakeChatModel
+from research_metrics import MetricsHandler, ReportMetrics, count_tokens, token_encoding
+
+MODEL = "fake-chat"
+
+
+class UsageTotals(BaseCallbackHandler):
+    """Add up the token usage the model reported, to check the metrics against."""
+
+    def __init__(self):
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def on_llm_end(self, response, **kwargs):
+        usage = response.llm_output["token_usage"]
+        self.prompt_tokens += usage["prompt_tokens"]
+        self.completion_tokens += usage["completion_tokens"]
+
+
+@pytest.fixture
+def wiki_calls():
+    return []
+
+
+@pytest.fixture
+def agent(wiki_calls):
+    def wiki(query):
+        wiki_calls.append(query)
+        return "Glucagon-like peptide-1 is an incretin hormone."
+
+    tools = [Tool(name="Wikipedia Research Tool", func=wiki, description="Useful for researching information on Wikipedia.")]
+    return build_research_agent(tools, FakeChatModel(latency=0.0, tokens_per_second=1e6, answer_words=20))
+
+
+def test_agent_run_is_accounted(agent, wiki_calls):
+    metrics = ReportMetrics(MODEL)
+    usage = UsageTotals()
+
+    agent({"input": "What is GLP-1?"}, callbacks=[metrics.handler("intro"), usage])
+
+    stats = metrics.to_dict()["sections"]["intro"]
+    # The fake agent makes one tool call, then answers: two model calls, action + finish
+    assert stats["llm_calls"] == 2
+    assert stats["iterations"] == 2
+    assert [call["tool"] for call in stats["tool_calls"]] == ["Wikipedia Research Tool"]
+    assert not stats["tool_calls"][0]["error"] and len(wiki_calls) == 1
+    assert stats["prompt_tokens"] == usage.prompt_tokens > 0
+    assert stats["completion_tokens"] == usage.completion_tokens > 0
+    assert stats["wall_time"] > 0
+
+
+def test_reported_usage_wins_and_is_priced():
+    stats = ReportMetrics("gpt-4")._stats("facts")
+    handler = MetricsHandler(stats, "gpt-4", threading.Lock())
+    run_id = uuid.uuid4()
+
+    handler.on_llm_start({}, ["x" * 400], run_id=run_id)
+    handler.on_llm_end(LLMResult(
+        generations=[[ChatGeneration(message=AIMessage(content="done"))]],
+        llm_output={"token_usage": {"prompt_tokens": 1000, "completion_tokens": 500}},
+    ), run_id=run_id)
+
+    assert (stats["prompt_tokens"], stats["completion_tokens"]) == (1000, 500)
+    assert stats["cost"] == pytest.approx(0.03 + 0.03)
+
+
+def test_failed_tool_calls_are_recorded():
+    metrics = ReportMetrics(MODEL)
+
+    def broken(query):
+        raise RuntimeError("upstream down")
+
+    tool = Tool(name="Google Scholar Search Tool", func=broken, description="Scholar")
+    with pytest.raises(RuntimeError):
+        tool.run("GLP-1", callbacks=[metrics.handler("papers")])
+
+    [call] = metrics.to_dict()["sections"]["papers"]["tool_calls"]
+    assert call["tool"] == "Google Scholar Search Tool" and call["error"]
+
+
+def test_exports(agent):
+    metrics = ReportMetrics(MODEL)
+    agent({"input": "What is GLP-1?"}, callbacks=[metrics.handler("intro")])
+    metrics.record_time("ingest", 0.25)
+
+    records = [json.loads(line) for line in metrics.to_json_lines().splitlines()]
+    sections = {record["section"]: record for record in records if record["type"] == "section"}
+    assert set(sections) == {"intro", "ingest"}
+    assert sections["intro"]["llm_calls"] == 2 and sections["ingest"]["wall_time"] == 0.25
+    assert [record["tool"] for record in records if record["type"] == "tool_call"] == ["Wikipedia Research Tool"]
+
+    text = metrics.to_openmetrics()
+    lines = text.splitlines()
+    assert lines[-1] == "# EOF" and text.endswith("\n")
+    families = {line.split()[2]: line.split()[3] for line in lines if line.startswith("# TYPE")}
+    assert families == {
+        "research_section_seconds": "gauge",
+        "research_section_iterations": "gauge",
+        "research_section_llm_calls": "gauge",
+        "research_tokens": "gauge",
+        "research_cost_usd": "gauge",
+        "research_tool_call_seconds": "summary",
+        "research_http_request_seconds": "summary",
+    }
+    assert 'research_section_llm_calls{section="intro"} 2' in lines
+    assert 'research_tool_call_seconds_count{tool="Wikipedia Research Tool"} 1' in lines
+    assert 'research_section_iterations{section="ingest"} 0' in lines
+
+
+def test_token_count_falls_back_when_the_encoding_cannot_load(monkeypatch):
+    if research_metrics.tiktoken is None:
+        pytest.skip("tiktoken is not installed")
+
+    def offline(model):
+        raise ConnectionError("encoding download failed")
+
+    monkeypatch.setattr(research_metrics.tiktoken, "encoding_for_model", offline)
+    token_encoding.cache_clear()
+    try:
+        assert count_tokens("x" * 40, "gpt-4") == 10
+    finally:
+        token_encoding.cache_clear()
+
+
+def test_streamed_tokens_are_counted_without_reported_usage():
+    stats = ReportMetrics(MODEL)._stats("intro")
+    handler = MetricsHandler(stats, MODEL, threading.Lock())
+    run_id = uuid.uuid4()
+
+    handler.on_chat_model_start({}, [[HumanMessage(content="x" * 400)]], run_id=run_id)
+    for token in ["GLP-1", " is", " an", " incretin"]:
+        handler.on_llm_new_token(token, run_id=run_id)
+    handler.on_llm_end(LLMResult(generations=[[ChatGeneration(message=AIMessage(content="done"))]]), run_id=run_id)
+
+    assert (stats["prompt_tokens"], stats["completion_tokens"]) == (count_tokens("x" * 400, MODEL), 4)
@@ -0,0 +1,127 @@
+import threading
+import time
+
+import pytest
+from chromadb.api.client import SharedSystemClient
+from langchain_community.vectorstores import Chroma
+
+from research_fakes import CallCounter, FakeChatModel, FakeEmbeddings
+from research_pipeline import ingest_reports, ingest_research, research_sections, run_sections
+
+LATENCY = 0.1
+
+
+def fake_agent(counter=None):
+    llm = FakeChatModel(latency=LATENCY, tokens_per_second=1e6, answer_words=20, counter=counter)
+
+    def run_agent(prompt, callbacks):
+        return llm.invoke(prompt, config={"callbacks": callbacks}).content
+    return run_agent
+
+
+def timed(sections):
+    """Record when each section's run starts and ends, and the results it was given."""
+    spans, seen = {}, {}
+    lock = threading.Lock()
+
+    def wrap(section):
+        run = section.run
+
+        def timed_run(results, callbacks):
+            started = time.perf_counter()
+            output = run(results, callbacks)
+            with lock:
+                spans[section.name] = (started, time.perf_counter())
+                seen[section.name] = results
+            return output
+        section.run = timed_run
+
+    for section in sections:
+        wrap(section)
+    return spans, seen
+
+
+def run_report(max_workers):
+    sections = research_sections("GLP-1", fake_agent())
+    spans, seen = timed(sections)
+    started = time.perf_counter()
+    results = run_sections(sections, max_workers=max_workers)
+    return results, spans, seen, time.perf_counter() - started
+
+
+def test_sections_wait_for_their_dependencies():
+    results, spans, seen, _ = run_report(max_workers=4)
+
+    assert set(results) == {"intro", "uniprot_info", "quant_facts", "papers", "books", "scholar_links"}
+    assert spans["quant_facts"][0] >= spans["intro"][1]
+    for name in ("papers", "books"):
+        assert spans[name][0] >= max(spans["intro"][1], spans["quant_facts"][1])
+        assert seen[name]["intro"] == results["intro"]
+        assert seen[name]["quant_facts"] == results["quant_facts"]
+    # Independent sections start alongside the introduction
+    for name in ("uniprot_info", "scholar_links"):
+        assert spans[name][0] < spans["intro"][1]
+
+
+def test_concurrent_sections_follow_the_critical_path():
+    *_, sequential = run_report(max_workers=1)
+    *_, concurrent = run_report(max_workers=4)
+
+    # Six sections one after another against intro -> quant_facts -> papers/books
+    assert sequential >= 6 * LATENCY
+    assert concurrent < 4 * LATENCY
+    assert concurrent < sequential / 1.5
+
+
+def test_completed_sections_are_not_rerun():
+    counter = CallCounter()
+    sections = research_sections("GLP-1", fake_agent(counter))
+
+    results = run_sections(sections, completed={"intro": "Saved intro.", "quant_facts": "Saved facts."})
+
+    assert results["intro"] == "Saved intro."
+    assert counter.snapshot()["openai.chat"] == 4
+
+
+def test_unknown_dependency_is_rejected():
+    sections = research_sections("GLP-1", fake_agent())
+    sections = [section for section in sections if section.name != "intro"]
+
+    with pytest.raises(ValueError, match="unknown sections"):
+        run_sections(sections)
+
+
+@pytest.fixture
+def embedding_calls():
+    return CallCounter()
+
+
+@pytest.fixture
+def chroma(tmp_path, embedding_calls):
+    yield Chroma(
+        collection_name="reports", embedding_function=FakeEmbeddings(counter=embedding_calls),
+        persist_directory=str(tmp_path / "chroma_db")
+    )
+    SharedSystemClient.clear_system_cache()
+
+
+def test_reingesting_a_report_adds_and_embeds_nothing(chroma, embedding_calls, make_report):
+    report = make_report(1, words=300)
+    added = ingest_research(chroma, 1, report["user_input"], report)
+    assert added > 1 and embedding_calls.snapshot() == {"openai.embeddings": 1}
+
+    assert ingest_research(chroma, 1, report["user_input"], report) == 0
+    assert len(chroma.get()["ids"]) == added
+    assert embedding_calls.snapshot() == {"openai.embeddings": 1}
+
+
+def test_text_shared_by_two_reports_is_kept_for_each(chroma, make_report):
+    first, second = make_report(1), make_report(2)
+    second["books"] = first["books"]
+
+    ingest_reports(chroma, [(1, first["user_input"], first), (2, second["user_input"], second)])
+
+    for research_id, topic in [(1, "compound-00001"), (2, "compound-00002")]:
+        books = chroma.get(where={"$and": [{"research_id": research_id}, {"section": "books"}]})
+        assert books["documents"] == [first["books"]]
+        assert books["metadatas"][0]["topic"] == topic
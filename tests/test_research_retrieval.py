@@ -0,0 +1,116 @@
+import pytest
+from chromadb.api.client import SharedSystemClient
+from langchain_community.vectorstores import Chroma
+
+from research_fakes import FakeEmbeddings
+from research_pipeline import chunk_id, chunk_research, ingest_research
+from research_retrieval import BM25Index, HybridRetriever
+from research_store import ResearchStore
+
+
+class LexicalOnlyStore:
+    """Vector store stand-in whose similarity search finds nothing, so every hit comes from BM25."""
+
+    def __init__(self, docs):
+        self.docs = {chunk_id(doc.page_content, doc.metadata["research_id"]): doc for doc in docs}
+        self.gets = []
+
+    def similarity_search(self, query, k=4, filter=None):
+        return []
+
+    def get(self, ids):
+        self.gets.append(list(ids))
+        found = [key for key in ids if key in self.docs]
+        return {
+            "ids": found,
+            "documents": [self.docs[key].page_content for key in found],
+            "metadatas": [self.docs[key].metadata for key in found],
+        }
+
+
+@pytest.fixture
+def chroma(tmp_path):
+    yield Chroma(collection_name="reports", embedding_function=FakeEmbeddings(), persist_directory=str(tmp_path))
+    SharedSystemClient.clear_system_cache()
+
+
+def test_index_holds_the_vector_store_chunks(chroma, make_report):
+    index = BM25Index()
+    for i in range(3):
+        report = make_report(i, words=300)
+        index.add_research(i, report)
+        ingest_research(chroma, i, report["user_input"], report)
+
+    assert sorted(index.ids) == sorted(chroma.get()["ids"])
+    assert len(index) > 3 * 5
+    assert index.texts == {}
+
+
+def test_bm25_only_hits_are_read_back_by_id(make_report):
+    index = BM25Index()
+    report = make_report(7, words=300)
+    index.add_research(7, report)
+    store = LexicalOnlyStore(chunk_research(7, report["user_input"], report))
+    retriever = HybridRetriever(vectorstore=store, index=index, k=2)
+
+    docs = retriever.invoke("trial tr-00007")
+
+    assert docs[0].metadata["research_id"] == 7
+    assert "tr-00007" in docs[0].page_content
+    assert all(len(doc.page_content) <= 1000 for doc in docs)
+    assert len(store.gets) == 1
+
+
+def test_kept_texts_need_no_vector_store(make_report):
+    index = BM25Index(keep_text=True)
+    index.add_research(1, make_report(1))
+    index.add_research(2, make_report(2))
+
+    docs = HybridRetriever(vectorstore=None, index=index, k=1).invoke("compound-00002 receptor")
+
+    assert docs[0].metadata["research_id"] == 2
+    assert "compound-00002" in docs[0].page_content
+
+
+def test_hybrid_fuses_the_same_chunk_from_both_searches(chroma, make_report):
+    index = BM25Index()
+    for i in range(20):
+        report = make_report(i)
+        index.add_research(i, report)
+        ingest_research(chroma, i, report["user_input"], report)
+
+    docs = HybridRetriever(vectorstore=chroma, index=index, k=4).invoke("trial tr-00011 HbA1c")
+
+    assert any("tr-00011" in doc.page_content for doc in docs)
+    assert len({chunk_id(doc.page_content, doc.metadata["research_id"]) for doc in docs}) == len(docs)
+
+
+def test_filter_restricts_both_searches(chroma, make_report):
+    index = BM25Index()
+    for i in range(5):
+        report = make_report(i)
+        index.add_research(i, report)
+        ingest_research(chroma, i, report["user_input"], report)
+
+    docs = HybridRetriever(vectorstore=chroma, index=index, k=4, filter={"research_id": 3}).invoke("compound-00001")
+
+    assert docs and all(doc.metadata["research_id"] == 3 for doc in docs)
+
+
+def test_legacy_reports_are_rebuilt_from_the_research_db(tmp_path, make_report):
+    store = ResearchStore(str(tmp_path / "MASTER.db"))
+    report = make_report(1, words=300)
+    report["introduction"] = "Glucagon (UniProt P01275) is cleaved from proglucagon. " + report["introduction"]
+    research_id = store.insert_research(
+        report["user_input"], report["introduction"], report["quant_facts"], report["publications"], report["books"], ""
+    )
+    store.conn.close()
+    # Ingested before content-hash IDs: raw texts under random IDs
+    legacy = LexicalOnlyStore([])
+
+    index = BM25Index.from_research_db(str(tmp_path / "MASTER.db"))
+    docs = HybridRetriever(vectorstore=legacy, index=index, k=2).invoke("P01275")
+
+    assert docs and "P01275" in docs[0].page_content
+    assert docs[0].metadata == {"research_id": research_id, "section": "introduction", "topic": "compound-00001"}
+    assert len(legacy.gets) == 1
@@ -0,0 +1,78 @@
+import sqlite3
+
+import pytest
+
+from research_store import ResearchStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ResearchStore(str(tmp_path / "MASTER.db"))
+    yield store
+    store.conn.close()
+
+
+def insert(store, topic, introduction="Glucagon-like peptide-1 lowers blood glucose."):
+    return store.insert_research(topic, introduction, "HbA1c fell 1.5%", "Papers", "Books", "")
+
+
+def test_metrics_updates_leave_the_search_index_alone(store):
+    research_id = insert(store, "GLP-1")
+    before = store.conn.total_changes
+
+    store.update_metrics(research_id, '{"total_seconds": 12.5}')
+
+    # total_changes counts rows written by triggers too
+    assert store.conn.total_changes - before == 1
+    assert [row["research_id"] for row in store.search_research("glucose")] == [research_id]
+
+
+def test_report_edits_are_reindexed(store):
+    research_id = insert(store, "GLP-1")
+
+    with store.conn:
+        store.conn.execute(
+            "UPDATE Research SET introduction = ? WHERE research_id = ?", ("Semaglutide slows gastric emptying.", research_id)
+        )
+
+    assert store.search_research("glucose") == []
+    assert [row["research_id"] for row in store.search_research("gastric")] == [research_id]
+
+
+def test_older_update_trigger_is_replaced(tmp_path):
+    path = str(tmp_path / "MASTER.db")
+    ResearchStore(path).conn.close()
+    with sqlite3.connect(path) as conn:
+        conn.execute("DROP TRIGGER research_fts_update")
+        conn.execute("""
+            CREATE TRIGGER research_fts_update AFTER UPDATE ON Research BEGIN
+                SELECT 1;
+            END
+        """)
+
+    store = ResearchStore(path)
+    sql = store.conn.execute("SELECT sql FROM sqlite_master WHERE name = 'research_fts_update'").fetchone()["sql"]
+    store.conn.close()
+
+    assert "AFTER UPDATE OF introduction, quant_facts, publications, books, prev_research ON Research" in sql
+
+
+def test_search_quotes_user_input(store):
+    research_id = insert(store, "GLP-1", "GLP-1 receptor agonists (e.g. semaglutide) AND more.")
+
+    assert [row["research_id"] for row in store.search_research('GLP-1 "AND')] == [research_id]
+    assert store.search_research("   ") == []
+
+
+def test_common_terms_rank_only_the_newest_candidates(store):
+    ids = [insert(store, f"report {i}", "GLP-1 " + "glucose " * (i % 5 + 1)) for i in range(10)]
+
+    ranked = store.search_research("glucose", candidates=4)
+
+    assert {row["research_id"] for row in ranked} == set(ids[-4:])
+    # The newest report repeats the term most often
+    assert ranked[0]["research_id"] == ids[-1]
+    assert len(store.search_research("glucose")) == 10
+    assert store.search_is_limited("glucose", candidates=4)
+    assert not store.search_is_limited("glucose", candidates=10)
+    assert not store.search_is_limited("report 3", candidates=4)
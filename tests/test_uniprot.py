@@ -0,0 +1,196 @@
+import json
+import urllib.error
+import urllib.request
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+from langchain_community.utilities import uniprot
+from langchain_community.utilities.uniprot import BULK_FIELDS, SEARCH_NAMESPACE, UniProtAPIWrapper
+
+from research_cache import ResponseCache
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.content = b'{"results": []}'
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    def get(self, url, timeout=None):
+        self.calls += 1
+        return self.responses.pop(0)
+
+
+def test_retry_delays_are_capped(monkeypatch):
+    delays = []
+    monkeypatch.setattr(uniprot.time, "sleep", delays.append)
+    wrapper = UniProtAPIWrapper(max_retry=10, sleep_time=0.2, max_backoff=5.0)
+    wrapper.session = FakeSession(
+        [FakeResponse(503)] * 9 + [FakeResponse(429, {"Retry-After": "3600"}), FakeResponse(200)]
+    )
+
+    wrapper._get("https://rest.uniprot.org/uniprotkb/P01275")
+
+    assert wrapper.session.calls == 11
+    assert delays[:5] == [0.2, 0.4, 0.8, 1.6, 3.2]
+    assert max(delays) == 5.0
+    assert sum(delays) < 0.2 * 2 ** 10
+
+
+def search_params(server):
+    return [parse_qs(urlsplit(path).query) for path in server.requests if "/search" in path]
+
+
+def test_bulk_search_projects_fields_and_follows_link_pages(uniprot_stub, stub_urls, make_entry):
+    entries = [make_entry(f"P{i:05d}") for i in range(5)]
+    server = uniprot_stub(entries)
+    bulk = UniProtAPIWrapper(top_k_results=5, bulk_page_size=2, **stub_urls(server))
+
+    results = bulk.search_proteins_bulk("GLP-1")
+
+    searches = search_params(server)
+    assert len(searches) == 3
+    assert all(params["fields"] == [",".join(BULK_FIELDS)] for params in searches)
+    assert [params.get("cursor") for params in searches] == [None, ["2"], ["4"]]
+    assert not [path for path in server.requests if "/search" not in path]
+
+    per_entry = UniProtAPIWrapper(top_k_results=5, bulk=False, **stub_urls(server))
+    assert results == per_entry.search_proteins("GLP-1")
+    assert results[0]["PubMed Citations"][0] == {
+        "title": "Study 0 of P00000",
+        "authors": "Author 0, Author 1",
+        "journal": "J Biol Chem",
+        "pubmed_id": "1000000",
+        "doi": "10.1000/P00000.0",
+    }
+
+
+def test_stub_serves_only_the_projected_fields(uniprot_stub, stub_urls, make_entry):
+    server = uniprot_stub([make_entry("P01275")])
+    url = stub_urls(server)["base_url_search"].rstrip("?")
+
+    with urllib.request.urlopen(f"{url}?query=GLP-1&fields={','.join(BULK_FIELDS)}") as response:
+        entry = json.load(response)["results"][0]
+
+    assert "PTM" not in {comment["commentType"] for comment in entry["comments"]}
+    assert {xref["database"] for xref in entry["uniProtKBCrossReferences"]} == {"PDB"}
+    with pytest.raises(urllib.error.HTTPError) as error:
+        urllib.request.urlopen(f"{url}?query=GLP-1&fields=accession,not_a_field")
+    assert error.value.code == 400
+
+
+@pytest.mark.parametrize("field", BULK_FIELDS)
+def test_every_bulk_field_is_needed(uniprot_stub, stub_urls, make_entry, field):
+    server = uniprot_stub([make_entry("P01275")])
+    per_entry = UniProtAPIWrapper(top_k_results=1, bulk=False, **stub_urls(server))
+    bulk = UniProtAPIWrapper(
+        top_k_results=1, bulk_fields=[name for name in BULK_FIELDS if name != field], **stub_urls(server)
+    )
+
+    assert bulk.search_proteins_bulk("GLP-1") != per_entry.search_proteins("GLP-1")
+
+
+def test_bulk_search_stops_at_top_k(uniprot_stub, stub_urls, make_entry):
+    server = uniprot_stub([make_entry(f"P{i:05d}") for i in range(5)])
+    bulk = UniProtAPIWrapper(top_k_results=3, bulk_page_size=2, **stub_urls(server))
+
+    results = bulk.search_proteins_bulk("GLP-1")
+
+    assert [result["Primary Accession"] for result in results] == ["P00000", "P00001", "P00002"]
+    assert len(search_params(server)) == 2
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResponseCache(str(tmp_path / "CACHE.db"))
+
+
+def entry_requests(server):
+    return [path for path in server.requests if "/search" not in path]
+
+
+@pytest.mark.parametrize("bulk", [False, True], ids=["per-entry", "bulk"])
+def test_truncated_run_is_cached(uniprot_stub, stub_urls, make_entry, cache, bulk):
+    server = uniprot_stub([make_entry(f"P{i:05d}") for i in range(10)])
+    wrapper = UniProtAPIWrapper(
+        top_k_results=10, bulk=bulk, max_concurrency=2, doc_content_chars_max=200, cache=cache, **stub_urls(server),
+    )
+
+    output = wrapper.run("GLP-1")
+
+    assert output.startswith("Entry ID: P00000")
+    # One search, plus the first batch of two entries per-entry
+    assert len(server.requests) == (1 if bulk else 3)
+
+    # run stops at its budget, but the search already named every hit
+    assert wrapper.run("GLP-1") == output
+    assert len(server.requests) == (1 if bulk else 3)
+    assert cache.stats()[SEARCH_NAMESPACE]["hits"] == 1
+
+
+def test_search_spanning_pages_is_cached_once_every_hit_is_known(uniprot_stub, stub_urls, make_entry, cache):
+    server = uniprot_stub([make_entry(f"P{i:05d}") for i in range(10)])
+    wrapper = UniProtAPIWrapper(top_k_results=5, bulk_page_size=2, cache=cache, **stub_urls(server))
+    search_key = wrapper._cache_key("5:GLP-1")
+
+    entries = wrapper.iter_proteins("GLP-1")
+    next(entries)
+    assert cache.get(SEARCH_NAMESPACE, search_key) is None
+    assert [entry["Primary Accession"] for entry in entries] == ["P00001", "P00002", "P00003", "P00004"]
+    assert cache.get(SEARCH_NAMESPACE, search_key) == ["P00000", "P00001", "P00002", "P00003", "P00004"]
+
+
+@pytest.mark.parametrize("bulk", [False, True], ids=["per-entry", "bulk"])
+def test_cached_search_is_replayed_entry_by_entry(uniprot_stub, stub_urls, make_entry, cache, bulk):
+    server = uniprot_stub([make_entry(f"P{i:05d}") for i in range(5)])
+    wrapper = UniProtAPIWrapper(top_k_results=5, bulk=bulk, cache=cache, **stub_urls(server))
+    first = wrapper.search_proteins("GLP-1")
+    fetched = len(server.requests)
+
+    assert wrapper.search_proteins("GLP-1") == first
+    assert next(wrapper.iter_proteins("GLP-1")) == first[0]
+    assert len(server.requests) == fetched
+
+
+def test_cache_keys_follow_parsed_fields_and_mode(uniprot_stub, stub_urls, make_entry, cache):
+    server = uniprot_stub([make_entry("P01275")])
+    urls = stub_urls(server)
+    full = UniProtAPIWrapper(bulk=False, cache=cache, **urls).get_protein_details("P01275")
+
+    partial = UniProtAPIWrapper(bulk=False, cache=cache, parse_fields=["Function"], **urls)
+    assert partial.get_protein_details("P01275")["Sequence"] == ""
+    assert full["Sequence"] != ""
+    assert len(entry_requests(server)) == 2
+
+    bulk = UniProtAPIWrapper(cache=cache, top_k_results=1, **urls)
+    per_entry = UniProtAPIWrapper(bulk=False, cache=cache, top_k_results=1, **urls)
+    bulk.search_proteins("GLP-1")
+    searches = len(server.requests) - len(entry_requests(server))
+    per_entry.search_proteins("GLP-1")
+    assert len(server.requests) - len(entry_requests(server)) == searches + 1
+    # The per-entry search reuses the entry cached by the first wrapper
+    assert len(entry_requests(server)) == 2
+
+    narrow = UniProtAPIWrapper(cache=cache, top_k_results=1, bulk_fields=["accession", "sequence"], **urls)
+    assert narrow._cache_key("P01275") != bulk._cache_key("P01275")
+
+
+def test_skipped_fields_get_their_own_defaults(make_entry):
+    wrapper = UniProtAPIWrapper(parse_fields=["Function"])
+    first = wrapper.parse_protein_details(make_entry("P01275"))
+    second = wrapper.parse_protein_details(make_entry("P01308"))
+
+    first["Structures"].append({"database": "PDB", "id": "1ABC"})
+    first["PubMed Citations"].append({"pubmed_id": "1"})
+
+    assert second["Structures"] == [] and second["PubMed Citations"] == []
+    assert uniprot.PARSE_FIELDS["Structures"] == [] and uniprot.PARSE_FIELDS["PubMed Citations"] == []